@@ -12,6 +12,17 @@ import re
 import textwrap
 
 
+# Whitespace normalization in one scan; the alternatives are tried in order:
+#   join   - single, standalone newline plus any indent after it -> one space
+#   indent - newline followed by an indent -> newline only
+#   other runs of spaces/tabs -> one space
+_RE_WHITESPACE = re.compile(r'(?P<join>(?<![ \t\n])\n(?![ \t]*\n)[ \t]*)|(?P<indent>\n[ \t]+)|[ \t]+')
+
+
+def _whitespace_repl(match: re.Match) -> str:
+    return '\n' if match.lastgroup == 'indent' else ' '
+
+
 class RawDescriptionHelpFormatterWithLineWrap(argparse.HelpFormatter):
     """
     Custom argparse formatter for description and epilog that wraps lines like
@@ -29,9 +40,7 @@ class RawDescriptionHelpFormatterWithLineWrap(argparse.HelpFormatter):
     def _fill_text(self, text, width, indent):
         textlines = []
 
-        text = re.sub(r'[ \t]+', ' ', text)  # collapse multiple spaces/tabs
-        text = re.sub(r'(?<=\n)[ \t]', '', text)  # remove spaces/tabs after newlines
-        text = re.sub(r'(?<![ \n])\n(?!\n)', ' ', text)  # remove single, standalone newlines
+        text = _RE_WHITESPACE.sub(_whitespace_repl, text)
         text = text.strip()
 
         for line in text.splitlines():
@@ -7,10 +7,19 @@ Copyright (c) 2025 by Eric Dey. All rights reserved.
 
 from __future__ import annotations  # for forward references in type hints
 
-import json
 import logging
 import os
 from pprint import pformat
+from typing import Any, Callable
+
+from JsonUtils import json_dumps_indented_bytes, json_loads
+
+# mypy_extensions is only needed when compiling this module with mypyc
+try:
+    from mypy_extensions import mypyc_attr
+except ImportError:
+    def mypyc_attr(*attrs: str, **kwattrs: object) -> Callable[[type], type]:  # type: ignore[misc]
+        return lambda cls: cls
 
 
 # Logger; may be overridden by users of this module
@@ -20,7 +29,7 @@ Log_Default_Format = '%(levelname)s %(name)s: %(message)s'
 MD_BLOCK_QUOTE_BOOKEND = '```'
 MD_INLINE_QUOTE_BOOKEND = '`'
 
-SKIPPED_RESPONSE_KINDS = [
+SKIPPED_RESPONSE_KINDS = frozenset({
     'codeblockUri',
     'confirmation',
     'command',
@@ -33,7 +42,12 @@ SKIPPED_RESPONSE_KINDS = [
     'thinking',
     'toolInvocationSerialized',
     'undoStop',
-]
+})
+
+
+def _plural(n: int) -> str:
+    """returns the plural suffix for a count of n"""
+    return 's' if n > 1 else ''
 
 
 class ChatRequestParseError(Exception):
@@ -51,17 +65,102 @@ class ChatRequestCanceled(Exception):
     pass
 
 
+def _handle_text_edit_group(resp: dict, parts: list[str]) -> None:
+    """
+    Edited file in the workspace; make note of the lines that were changed.
+    A future enhancement would be to show the added text; this could be tricky
+    when Copilot uses multiple passes to arrive at a final text.
+    """
+    if not resp.get('uri', ''):
+        Log.info(f"skipping unhandled response kind: {resp['kind']}")
+        return
+
+    fsPath = resp['uri'].get('fsPath', '**unknown file**')
+    edits = resp.get('edits', ())
+    parts.append(f"Edited file: `{fsPath}`\n")
+    for edit in edits:
+        for editRegion in edit:
+            if not isinstance(editRegion, dict):
+                raise ChatRequestParseError(f"expected editRegion to be a dict; type is: {type(editRegion)} \n{pformat(editRegion)}")
+            try:
+                text_len = len(editRegion['text'])
+                editRange = editRegion['range']
+                line_start = editRange['startLineNumber']
+                line_end = editRange['endLineNumber']
+                multiLine = line_end > line_start
+            except (KeyError, TypeError) as e:
+                raise ChatRequestParseError(f"unknown editRegion dict structure: {e} \n{pformat(editRegion)}")
+
+            if text_len == 0:
+                parts.append("  - deleted ")
+            else:
+                parts.append(f"  - added {text_len} char{_plural(text_len)} of text, ")
+
+            parts.append(f"line {line_start} ")
+            parts.append(f"to {line_end}\n" if multiLine else '\n')
+    parts.append('\n')  # extra newline after file edit summary
+
+
+def _handle_inline_reference(resp: dict, parts: list[str]) -> None:
+    """Inline references to files or method names; inline quote it"""
+    inline = resp.get('inlineReference', {})
+
+    # Two formats exist:
+    #   New (.jsonl): { "name": "symbol", "location": { "uri": { "fsPath": ... }, "range": {...} } }
+    #   Old (.json):  { "fsPath": "...", "path": "...", "scheme": "file" }  (URI object directly)
+    #   Empty:        {}  (unresolved reference — VS Code never populated it)
+    name = inline.get('name', '')
+    location = inline.get('location', {})
+    new_fs_path = location.get('uri', {}).get('fsPath', '')   # new format
+    old_fs_path = inline.get('fsPath', '')                    # old format: URI obj on inlineReference
+    fs_path = new_fs_path or old_fs_path
+    line_no = location.get('range', {}).get('startLineNumber')  # new format only
+
+    if name:
+        # New format: use the symbol name; annotate with (filename:line) for
+        # project files so the reader knows where the symbol lives.
+        ref = name
+        _is_project_file = (
+            fs_path
+            and line_no is not None
+            and '/usr/' not in fs_path
+            and '.vscode/extensions' not in fs_path
+        )
+        parts.append(f"{MD_INLINE_QUOTE_BOOKEND}{ref}{MD_INLINE_QUOTE_BOOKEND}")
+        if _is_project_file:
+            parts.append(f" ({os.path.basename(fs_path)}:{line_no})")
+    elif fs_path:
+        # Old format: no symbol name; use the basename as the display label.
+        # No annotation needed — the label already is the filename.
+        ref = os.path.basename(fs_path)
+        parts.append(f"{MD_INLINE_QUOTE_BOOKEND}{ref}{MD_INLINE_QUOTE_BOOKEND}")
+    else:
+        # Empty / unresolved reference — nothing useful to render; skip silently.
+        pass
+
+
+# response kind -> handler that appends the rendered text for the response to parts
+_RESPONSE_HANDLERS: dict[str, Callable[[dict, list[str]], None]] = {
+    'textEditGroup': _handle_text_edit_group,
+    'inlineReference': _handle_inline_reference,
+}
+
+
+@mypyc_attr(native_class=False)  # pickled by the ChatSession disk cache
 class Request:
-    def __init__(self, requestInput: dict|str) -> None:  # noqa: E227
+    __slots__ = ('request', 'response', 'size', 'requestDict', '_rawRequest', '_rawResponse', '_rawJson')
+
+    def __init__(self, requestInput: Any) -> None:  # dict or JSON string
         self.request: str = ''
         self.response: str = ''
         self.size: int = 0  # size of the request + response strings
         self.requestDict: dict = {}  # parsed request dictionary
-        self.rawRequest: str = ''  # original request JSON
-        self.rawResponse: str = ''  # original response JSON
+        self._rawRequest: bytes | None = None  # cache for rawRequestBytes
+        self._rawResponse: bytes | None = None  # cache for rawResponseBytes
+        self._rawJson: bytes | None = None  # cache for rawJsonBytes
 
         if isinstance(requestInput, str):
-            self.requestDict = json.loads(requestInput)
+            self.requestDict = json_loads(requestInput)
         elif isinstance(requestInput, dict):
             self.requestDict = requestInput
         else:
@@ -71,109 +170,90 @@ class Request:
             raise ChatRequestCanceled("request was canceled")
 
         self.request = self.requestDict.get('message', {}).get('text', '')
-        self.rawRequest = json.dumps(self.request, indent=2)
         if self.request == '':
             raise ChatRequestEmptyRequest("request is empty")
 
         responses = self.requestDict.get('response', [])
-        self.rawResponse = json.dumps(responses, indent=2)
         if len(responses) == 0:
-            responses.append('_No response_')
+            responses = ['_No response_']  # don't alter requestDict
 
-        responseValue = ''
+        parts: list[str] = []  # response text fragments; joined once at the end
         hiddenPresentation = False  # Copilot's response was hidden; usually indicates direct file edits
         for resp in responses:
             if not isinstance(resp, dict):
                 continue
 
-            if resp.get('kind', '') == 'toolInvocation' and resp.get('presentation', '') == 'hidden':
+            # simple text value response w/o a kind qualifier; skip a
+            # responseDict without a 'kind' key if there is no value
+            if 'kind' not in resp:
+                value = resp.get('value')
+                # skip standalone block quote start/stop if the presentation is hidden;
+                # the substring test avoids copying values that can't be a bookend
+                if value is not None and not hiddenPresentation and (
+                        MD_BLOCK_QUOTE_BOOKEND not in value or value.strip() != MD_BLOCK_QUOTE_BOOKEND):
+                    parts.append(value)
+                continue
+
+            kind = resp['kind']
+
+            if kind == 'toolInvocation' and resp.get('presentation', '') == 'hidden':
                 hiddenPresentation = True
 
-            # simple text value response w/o a kind qualifier
-            if 'value' in resp and 'kind' not in resp:
-                v = resp['value']
-                # skip standalone block quote start/stop if the presentation is hidden
-                if not hiddenPresentation and v.strip() != MD_BLOCK_QUOTE_BOOKEND:
-                    # responseValue += v + '\n\n'
-                    responseValue += v
-
-            # edited file in the workspace; make note of the lines that were changed;
-            # a future enhancement would be to show the added text; this could be tricky
-            # when Copilot uses multiple passes to arrive at a final text
-            elif resp.get('kind', '') == 'textEditGroup' and resp.get('uri', ''):
-                fsPath = resp['uri'].get('fsPath', '**unknown file**')
-                responseValue += f"Edited file: `{fsPath}`\n"
-                plural = lambda n, s='s': s if n > 1 else ''  # noqa: E731
-                for edit in resp.get('edits', []):
-                    for editRegion in edit:
-                        if not isinstance(editRegion, dict):
-                            raise ChatRequestParseError(f"expected editRegion to be a dict; type is: {type(editRegion)} \n{pformat(editRegion)}")
-                        try:
-                            text_len = len(editRegion['text'])
-                            if text_len == 0:
-                                responseValue += "  - deleted "
-                            else:
-                                responseValue += f"  - added {text_len} char{plural(text_len)} of text, "
-
-                            line_start = editRegion['range']['startLineNumber']
-                            line_end = editRegion['range']['endLineNumber']
-
-                            responseValue += f"line {line_start} "
-                            responseValue += f"to {line_end}\n" if line_end > line_start else '\n'
-                        except (KeyError, TypeError) as e:
-                            raise ChatRequestParseError(f"unknown editRegion dict structure: {e} \n{pformat(editRegion)}")
-                responseValue += '\n'  # extra newline after file edit summary
-
-            # inline references to files or method names; inline quote it
-            elif resp.get('kind', '') == 'inlineReference':
-                inline = resp.get('inlineReference', {})
-
-                # Two formats exist:
-                #   New (.jsonl): { "name": "symbol", "location": { "uri": { "fsPath": ... }, "range": {...} } }
-                #   Old (.json):  { "fsPath": "...", "path": "...", "scheme": "file" }  (URI object directly)
-                #   Empty:        {}  (unresolved reference — VS Code never populated it)
-                name = inline.get('name', '')
-                location = inline.get('location', {})
-                new_fs_path = location.get('uri', {}).get('fsPath', '')   # new format
-                old_fs_path = inline.get('fsPath', '')                    # old format: URI obj on inlineReference
-                fs_path = new_fs_path or old_fs_path
-                line_no = location.get('range', {}).get('startLineNumber')  # new format only
-
-                if name:
-                    # New format: use the symbol name; annotate with (filename:line) for
-                    # project files so the reader knows where the symbol lives.
-                    ref = name
-                    _is_project_file = (
-                        fs_path
-                        and line_no is not None
-                        and '/usr/' not in fs_path
-                        and '.vscode/extensions' not in fs_path
-                    )
-                    responseValue += f"{MD_INLINE_QUOTE_BOOKEND}{ref}{MD_INLINE_QUOTE_BOOKEND}"
-                    if _is_project_file:
-                        responseValue += f" ({os.path.basename(fs_path)}:{line_no})"
-                elif fs_path:
-                    # Old format: no symbol name; use the basename as the display label.
-                    # No annotation needed — the label already is the filename.
-                    ref = os.path.basename(fs_path)
-                    responseValue += f"{MD_INLINE_QUOTE_BOOKEND}{ref}{MD_INLINE_QUOTE_BOOKEND}"
-                else:
-                    # Empty / unresolved reference — nothing useful to render; skip silently.
-                    pass
+            handler = _RESPONSE_HANDLERS.get(kind)
+            if handler is not None:
+                handler(resp, parts)
 
             # skip response kinds that aren't useful for reporting
-            elif resp.get('kind', '') in SKIPPED_RESPONSE_KINDS:
+            elif kind in SKIPPED_RESPONSE_KINDS:
                 pass
 
             # report response kinds that haven't been explicitly handled;
             # these may warrant investigation for possible handling
-            elif 'kind' in resp:
-                Log.info(f"skipping unhandled response kind: {resp['kind']}")
-
-            # skip responseDict without a 'kind' key
             else:
-                pass
+                Log.info(f"skipping unhandled response kind: {kind}")
 
-        self.response = responseValue
+        self.response = ''.join(parts)
 
         self.size = len(self.request) + len(self.response)
+
+
+    @property
+    def rawRequestBytes(self) -> bytes:
+        """original request JSON as UTF-8 bytes; serialized on first access"""
+        if self._rawRequest is None:
+            self._rawRequest = json_dumps_indented_bytes(self.request)
+        return self._rawRequest
+
+
+    @property
+    def rawResponseBytes(self) -> bytes:
+        """original response JSON as UTF-8 bytes; serialized on first access"""
+        if self._rawResponse is None:
+            self._rawResponse = json_dumps_indented_bytes(self.requestDict.get('response', []))
+        return self._rawResponse
+
+
+    @property
+    def rawJsonBytes(self) -> bytes:
+        """original request and response JSON as UTF-8 bytes; serialized on first access"""
+        if self._rawJson is None:
+            self._rawJson = json_dumps_indented_bytes(self.requestDict)
+        return self._rawJson
+
+
+    @property
+    def rawRequest(self) -> str:
+        """original request JSON"""
+        return self.rawRequestBytes.decode('utf-8')
+
+
+    @property
+    def rawResponse(self) -> str:
+        """original response JSON"""
+        return self.rawResponseBytes.decode('utf-8')
+
+
+    @property
+    def rawJson(self) -> str:
+        """original request and response JSON"""
+        return self.rawJsonBytes.decode('utf-8')
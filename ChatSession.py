@@ -7,22 +7,183 @@ Copyright (c) 2025 by Eric Dey. All rights reserved.
 
 from __future__ import annotations  # for forward references in type hints
 
+import concurrent.futures
+import functools
 import hashlib
-import json
 import logging
 import os
 import pathlib
-from typing import Iterator
-
+import pickle
+import sys
+import tempfile
+import time
+from typing import Any, Iterator
+
+import ChatRequest
+import JsonUtils
 from ChatRequest import Request, ChatRequestParseError, ChatRequestEmptyRequest, ChatRequestCanceled
+from JsonUtils import json_dumps_canonical, json_loads
 
 
 # Logger; may be overridden by users of this module
 Log = logging.getLogger(__file__)
 Log_Default_Format = '%(levelname)s %(name)s: %(message)s'
 
+# minimum total size of the session files to parse before load_chats() uses
+# worker processes; smaller batches don't repay the worker start-up cost
+PROCESS_POOL_MIN_BYTES = 8 * 1024 * 1024
+
+# minimum number of sessions before load_chats() overlaps file reads in threads
+# when worker processes are unavailable
+THREAD_POOL_MIN_SESSIONS = 64
+THREAD_POOL_MAX_WORKERS = 32
+
+# chat session file extensions that Chat can load; see Chat._load_from_file()
+SESSION_FILE_EXTENSIONS = ('.json', '.jsonl')
+
+# setting this environment variable to '0' makes load_chats() load serially
+CHAT_LOAD_PARALLEL_ENV_VAR = 'COPILOT_CHAT_PARALLEL_LOAD'
+
+# optional on-disk cache used by Chat.from_path(); it is only enabled when
+# this environment variable names a directory. Entries are full copies of
+# the parsed sessions, so the directory must be private to the user.
+CHAT_CACHE_DIR_ENV_VAR = 'COPILOT_CHAT_CACHE_DIR'
+
+# seconds between scans of the cache for entries whose session file was deleted
+CHAT_CACHE_PRUNE_INTERVAL = 24 * 60 * 60
+_CHAT_CACHE_PRUNE_MARKER = '.last-prune'
+_chatCachePruned: set[str] = set()  # cache directories checked for pruning by this process
+
+# container nesting depth streamed by _hash_canonical(); deeper values are serialized whole
+HASH_STREAM_DEPTH = 2  # session dict -> requests list -> request dicts
+
+
+def _hash_canonical(hasher: Any, obj: Any, depth: int = HASH_STREAM_DEPTH) -> None:
+    """
+    Feeds the canonical JSON serialization of obj to hasher piece by piece so
+    the serialization of a whole session is never held in memory at once. The
+    bytes fed are identical to json_dumps_canonical(obj).
+    """
+    if depth > 0 and isinstance(obj, dict):
+        hasher.update(b'{')
+        for i, key in enumerate(sorted(obj)):
+            if i:
+                hasher.update(b',')
+            hasher.update(json_dumps_canonical(key))
+            hasher.update(b':')
+            _hash_canonical(hasher, obj[key], depth - 1)
+        hasher.update(b'}')
+    elif depth > 0 and isinstance(obj, list):
+        hasher.update(b'[')
+        for i, item in enumerate(obj):
+            if i:
+                hasher.update(b',')
+            _hash_canonical(hasher, item, depth - 1)
+        hasher.update(b']')
+    else:
+        hasher.update(json_dumps_canonical(obj))
+
+
+@functools.lru_cache(maxsize=None)
+def _chat_cache_code_version() -> str:
+    """
+    Returns a hash of the code that builds cached Chat objects, so that any
+    change to parsing or rendering invalidates entries made by other versions.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(sys.version.encode('utf-8'))  # pickles may not load across interpreters
+    for module in (ChatRequest, JsonUtils, sys.modules[__name__]):
+        with open(module.__file__ or '', 'rb') as f:
+            hasher.update(f.read())
+    return hasher.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _chat_cache_dir_usable(cacheDir: str) -> bool:
+    """
+    Creates the cache directory if needed. Cached entries are unpickled, so
+    on POSIX systems the directory must be owned by the user and not be group
+    or world writable; otherwise the cache is not used.
+    """
+    try:
+        os.makedirs(cacheDir, mode=0o700, exist_ok=True)
+        st = os.stat(cacheDir)
+    except OSError as e:
+        Log.debug(f"chat cache directory unavailable {cacheDir}: {e}")
+        return False
+    if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o022):
+        Log.warning(f"not using chat cache directory {cacheDir}: it must be owned by you and not writable by others")
+        return False
+    return True
+
+
+def _chat_cache_dir() -> str:
+    """returns the on-disk cache directory, or '' when the cache is disabled or unusable"""
+    cacheDir = os.environ.get(CHAT_CACHE_DIR_ENV_VAR, '')
+    if not cacheDir or not _chat_cache_dir_usable(cacheDir):
+        return ''
+    if cacheDir not in _chatCachePruned:
+        _chatCachePruned.add(cacheDir)
+        _prune_chat_cache(cacheDir)
+    return cacheDir
+
+
+def _chat_cache_entry(cacheDir: str, filePath: str, st: os.stat_result, lastUpdate: float) -> tuple[str, tuple]:
+    """returns the cache file and the expected header for an absolute session file path"""
+    header = (filePath, (_chat_cache_code_version(), st.st_mtime_ns, st.st_ctime_ns, st.st_size, lastUpdate))
+    pathHash = hashlib.blake2b(filePath.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(cacheDir, f"{pathHash}.pkl"), header
+
+
+def _read_chat_cache_header(cacheFile: str) -> tuple:
+    """returns the (session file path, file state) header of a cache entry"""
+    with open(cacheFile, 'rb') as f:
+        return pickle.load(f)
+
+
+def _prune_chat_cache(cacheDir: str) -> None:
+    """
+    Removes cache entries whose session file no longer exists, at most once
+    per CHAT_CACHE_PRUNE_INTERVAL. Only the small entry headers are read.
+    """
+    marker = os.path.join(cacheDir, _CHAT_CACHE_PRUNE_MARKER)
+    try:
+        if time.time() - os.path.getmtime(marker) < CHAT_CACHE_PRUNE_INTERVAL:
+            return
+    except OSError:
+        pass  # never pruned
+    try:
+        with open(marker, 'w'):
+            pass  # touch
+        entries = list(os.scandir(cacheDir))
+    except OSError as e:
+        Log.debug(f"unable to prune chat cache {cacheDir}: {e}")
+        return
+
+    now = time.time()
+    for entry in entries:
+        if entry.name.endswith('.pkl'):
+            try:
+                sessionFile, _ = _read_chat_cache_header(entry.path)
+                stale = not os.path.exists(sessionFile)
+            except Exception:
+                stale = True  # unreadable entry
+        elif entry.name.endswith('.tmp'):
+            try:
+                stale = now - entry.stat().st_mtime > CHAT_CACHE_PRUNE_INTERVAL  # interrupted write
+            except OSError:
+                stale = False
+        else:
+            continue
+        if stale:
+            try:
+                os.remove(entry.path)
+            except OSError as e:
+                Log.debug(f"unable to prune chat cache file {entry.path}: {e}")
+
 
 class Chat:
+    __slots__ = ('id', 'updated', 'created', 'requests', 'size', 'format_type', 'format_version')
 
     @staticmethod
     def sorting_attributes() -> list[str]:
@@ -30,9 +191,45 @@ class Chat:
         return ['id', 'created', 'updated']
 
 
-    def __init__(self, sessionInput: dict | str | os.PathLike, id: str = '', lastUpdate: float = 0.0, workspaceId: str = '<empty>') -> None:
+    @classmethod
+    def from_path(cls, filePath: str | os.PathLike, lastUpdate: float = 0.0, workspaceId: str = '<empty>') -> Chat:
         """
-        Initialize the chat session from a file path, dict, or JSON string.
+        Returns a Chat for a session file. When the on-disk cache is enabled,
+        a pickled copy is used if neither the file nor this code has changed
+        since the copy was made. Any cache error falls back to parsing the file.
+        """
+        cacheDir = _chat_cache_dir()
+        if not cacheDir:
+            return cls(filePath, lastUpdate=lastUpdate, workspaceId=workspaceId)
+
+        filePath = os.path.abspath(filePath)
+        cacheFile, header = _chat_cache_entry(cacheDir, filePath, os.stat(filePath), lastUpdate)
+
+        # an entry is a small header pickle followed by the Chat pickle, so
+        # pruning and stale entries don't need the whole session unpickled
+        try:
+            with open(cacheFile, 'rb') as f:
+                if pickle.load(f) == header:
+                    return pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            Log.debug(f"ignoring unreadable chat cache file {cacheFile}: {e}")
+
+        chat = cls(filePath, lastUpdate=lastUpdate, workspaceId=workspaceId)
+        try:
+            with tempfile.NamedTemporaryFile('wb', dir=cacheDir, suffix='.tmp', delete=False) as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(chat, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, cacheFile)  # atomic so concurrent loaders never see a partial file
+        except OSError as e:
+            Log.debug(f"unable to write chat cache file {cacheFile}: {e}")
+        return chat
+
+
+    def __init__(self, sessionInput: dict | str | bytes | os.PathLike, id: str = '', lastUpdate: float = 0.0, workspaceId: str = '<empty>') -> None:
+        """
+        Initialize the chat session from a file path, dict, or JSON string/bytes.
 
         When sessionInput is a file path, the id and lastUpdate defaults
         are derived from filesystem metadata, and the file format is
@@ -49,26 +246,23 @@ class Chat:
         self.format_type: str = 'snapshot'
         self.format_version: int = 3
 
-        # Configure logging only if it hasn't been configured yet
-        logging.basicConfig(format=Log_Default_Format, force=False)
-
         # prepare sessionDict from the based on the input format
         if (isinstance(sessionInput, (os.PathLike, pathlib.Path)) or
            (isinstance(sessionInput, str) and os.path.isfile(sessionInput))
         ):
             sessionDict = self._load_from_file(pathlib.Path(sessionInput), lastUpdate)
-        elif isinstance(sessionInput, str):
-            sessionDict = json.loads(sessionInput)
+        elif isinstance(sessionInput, (str, bytes)):
+            sessionDict = json_loads(sessionInput)
         elif isinstance(sessionInput, dict):
             # assumes no mutations and no use after init; make copy if this ever changes
             sessionDict = sessionInput
         else:
-            raise ValueError("sessionInput must be a file path, dict, or JSON string")
+            raise ValueError("sessionInput must be a file path, dict, or JSON string/bytes")
 
         # generate a stable hash if id is still not set (non-file-path inputs)
         if self.id == '':
-            hasher = hashlib.md5()  # this isn't crypto so cool your jets
-            hasher.update(json.dumps(sessionDict, sort_keys=True).encode('utf-8'))
+            hasher = hashlib.blake2b(digest_size=16)  # this isn't crypto so cool your jets
+            _hash_canonical(hasher, sessionDict)
             self.id = hasher.hexdigest()
 
         # attempt to refine creation and last-update timestamps from session content
@@ -84,6 +278,15 @@ class Chat:
                 pass  # leave default value
 
         for req in sessionDict.get('requests', []):
+            # the common skip cases are checked here rather than by catching
+            # the exceptions Request raises for them
+            if isinstance(req, dict):
+                if req.get('isCanceled', False) is True:
+                    Log.debug(f"skipping canceled request in workspace {workspaceId} chat {self.id}: request was canceled")
+                    continue
+                if req.get('message', {}).get('text', '') == '':
+                    Log.debug(f"chat request is empty in workspace {workspaceId} chat {self.id}; skipping response parsing")
+                    continue
             try:
                 r = Request(req)
                 self.requests.append(r)
@@ -110,21 +313,19 @@ class Chat:
             self.created = ctime
             self.updated = ctime
 
-        with open(filePath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # detect file format based on file extension
+        # detect file format based on file extension; files are read as
+        # bytes and the JSON parser decodes the UTF-8 itself
         ext = filePath.suffix.lower()
         if ext == '.jsonl':
-            return self._parse_eventlog(content)
+            return self._parse_eventlog(filePath.read_bytes())
         elif ext == '.json':
             # original format where entire session is one big JSON object
-            return json.loads(content)
+            return json_loads(filePath.read_bytes())
         else:
             raise ValueError(f"Unsupported chat session file extension: {ext!r}")
 
 
-    def _parse_eventlog(self, content: str) -> dict:
+    def _parse_eventlog(self, content: str | bytes) -> dict:
         """Parse a JSONL event-log file and return a snapshot compatible session dict"""
 
         lines = [line.strip() for line in content.splitlines() if line.strip()]
@@ -132,7 +333,7 @@ class Chat:
             return {'requests': []}
 
         # validate first event which has session metadata
-        first_event = json.loads(lines[0])
+        first_event = json_loads(lines[0])
         if first_event.get('kind') != 0:
             raise ValueError(
                 f"JSONL chat session does not begin with a kind:0 snapshot event; "
@@ -159,7 +360,7 @@ class Chat:
 
         # replay remaining events, one JSON object per line
         for line in lines[1:]:
-            event = json.loads(line)
+            event = json_loads(line)
             kind = event.get('kind')
             k = event.get('k')       # present on both kind:1 and kind:2 patch events
             val = event.get('v')
@@ -251,3 +452,85 @@ class Chat:
     def __iter__(self) -> Iterator[tuple[str, str, int]]:
         for r in self.requests:
             yield (r.request, r.response, r.size)
+
+
+def _build_chat(args: tuple) -> Chat | Exception:
+    """
+    Builds a Chat from Chat.from_path() arguments. Exceptions are returned
+    instead of raised so that one bad session doesn't abort a batch load.
+    """
+    try:
+        return Chat.from_path(*args)
+    except Exception as e:
+        return e
+
+
+def _init_worker_logging(level: int) -> None:
+    """configures logging in a worker process that did not inherit the parent's handlers"""
+    logging.basicConfig(level=level, format=Log_Default_Format, force=False)
+
+
+def _parse_size(args: tuple, cacheDir: str) -> int:
+    """
+    Returns the size of the session file that Chat.from_path(*args) would
+    parse, or 0 when it would be read from the disk cache instead.
+    """
+    filePath = os.path.abspath(args[0])
+    try:
+        st = os.stat(filePath)
+    except OSError:
+        return 0  # from_path() reports the missing file
+    if cacheDir:
+        cacheFile, header = _chat_cache_entry(cacheDir, filePath, st, args[1] if len(args) > 1 else 0.0)
+        try:
+            if _read_chat_cache_header(cacheFile) == header:
+                return 0
+        except Exception:
+            pass  # no usable cache entry
+    return st.st_size
+
+
+def load_chats(sessionArgs: list[tuple]) -> list[Chat | Exception]:
+    """
+    Builds a Chat for each tuple of Chat.from_path() arguments. Parsing is
+    CPU-bound, so when the files to parse total PROCESS_POOL_MIN_BYTES or
+    more they are spread across worker processes; sessions found in the disk
+    cache are loaded directly. Where worker processes are unavailable, very
+    large batches use threads so that blocking file reads overlap. Results
+    are in the same order as sessionArgs; a session that failed to load has
+    the raised exception in place of its Chat.
+    """
+    workers = os.cpu_count() or 1
+    if workers <= 1 or len(sessionArgs) < 2 or os.environ.get(CHAT_LOAD_PARALLEL_ENV_VAR, '') == '0':
+        return [_build_chat(args) for args in sessionArgs]
+
+    cacheDir = _chat_cache_dir()
+    sizes = [_parse_size(args, cacheDir) for args in sessionArgs]
+    parseIndexes = [i for i, size in enumerate(sizes) if size]  # sessions not in the disk cache
+    if len(parseIndexes) < 2 or sum(sizes) < PROCESS_POOL_MIN_BYTES:
+        return [_build_chat(args) for args in sessionArgs]
+
+    # cached sessions are cheap to load, so only the others go to the workers
+    results: list[Chat | Exception | None] = [None if size else _build_chat(args) for args, size in zip(sessionArgs, sizes)]
+    parseArgs = [sessionArgs[i] for i in parseIndexes]
+
+    chats: list[Chat | Exception] | None = None
+    chunksize = max(1, len(parseArgs) // (workers * 4))
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(parseArgs)), initializer=_init_worker_logging,
+                                                    initargs=(logging.getLogger().getEffectiveLevel(),)) as executor:
+            chats = list(executor.map(_build_chat, parseArgs, chunksize=chunksize))
+    except (OSError, NotImplementedError, concurrent.futures.process.BrokenProcessPool) as e:
+        Log.debug(f"worker processes unavailable: {e}")
+
+    if chats is None and len(parseArgs) < THREAD_POOL_MIN_SESSIONS:
+        Log.debug("loading chat sessions serially")
+        chats = [_build_chat(args) for args in parseArgs]
+    elif chats is None:
+        Log.debug("loading chat sessions in threads")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(THREAD_POOL_MAX_WORKERS, len(parseArgs))) as executor:
+            chats = list(executor.map(_build_chat, parseArgs))
+
+    for i, chat in zip(parseIndexes, chats):
+        results[i] = chat
+    return results  # type: ignore[return-value]  # every slot is filled
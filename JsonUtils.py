@@ -0,0 +1,81 @@
+"""
+JSON utilities
+
+Copyright (c) 2025 by Eric Dey. All rights reserved.
+
+"""
+
+from __future__ import annotations  # for forward references in type hints
+
+import json
+import re
+from typing import Any
+
+# orjson is an optional, faster drop-in; the stdlib json module is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# orjson parses integers beyond 64 bits as floats, so documents with a run of
+# this many digits are parsed by the stdlib, which keeps every integer exact;
+# a 19-digit run may be a number below the 64-bit minimum
+_Long_Digits_Str = re.compile(r'[0-9]{19}')
+_Long_Digits_Bytes = re.compile(rb'[0-9]{19}')
+
+# characters that the stdlib escapes with its default ensure_ascii=True
+_Non_Ascii_Chars = re.compile('[\x7f-\U0010ffff]')
+
+
+def json_loads(data: str | bytes) -> Any:
+    """
+    Parses a JSON document from a str or UTF-8 encoded bytes. The result is
+    the same with or without orjson; documents orjson would parse differently
+    (integers beyond 64 bits) or rejects (lone UTF-16 surrogate escapes) are
+    parsed by the stdlib.
+    """
+    if orjson is not None:
+        long_digits = _Long_Digits_Bytes if isinstance(data, bytes) else _Long_Digits_Str
+        if long_digits.search(data) is None:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass  # e.g. lone UTF-16 surrogate escapes; the stdlib accepts these
+    return json.loads(data)
+
+
+def _escape_non_ascii_char(match: re.Match) -> str:
+    """returns the \\u escape of a character, as a surrogate pair beyond the BMP"""
+    code = ord(match.group())
+    if code > 0xffff:
+        code -= 0x10000
+        return '\\u{0:04x}\\u{1:04x}'.format(0xd800 | (code >> 10), 0xdc00 | (code & 0x3ff))
+    return '\\u{0:04x}'.format(code)
+
+
+def json_dumps_indented_bytes(obj: Any) -> bytes:
+    """
+    Returns obj serialized as JSON with 2-space indentation. Non-ASCII
+    characters are written as \\u escapes, as json.dumps() does by default, so
+    the output is ASCII and survives markdown sanitizing unchanged.
+    """
+    if orjson is not None:
+        try:
+            text = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+        except orjson.JSONEncodeError:
+            pass  # e.g. integers beyond 64 bits or lone surrogates; the stdlib handles these
+        else:
+            return _Non_Ascii_Chars.sub(_escape_non_ascii_char, text).encode('ascii')
+    return json.dumps(obj, indent=2).encode('ascii')
+
+
+def json_dumps_canonical(obj: Any) -> bytes:
+    """
+    Returns obj serialized as compact, sorted-key JSON in bytes. This always
+    uses the stdlib so that hashes of session data don't depend on whether
+    orjson is installed; orjson formats some floats differently (1e16 vs
+    1e+16). Lone UTF-16 surrogates are kept with 'surrogatepass' so that
+    each value's bytes don't depend on the rest of the document.
+    """
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8', errors='surrogatepass')
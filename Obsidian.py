@@ -9,8 +9,10 @@ from __future__ import annotations  # for forward references in type hints
 
 import argparse
 import datetime
+import functools
 import logging
 import os
+import time
 from typing import IO, Any
 
 
@@ -23,7 +25,9 @@ def argparse_groups(parser: argparse.ArgumentParser) -> None:
     """Adds and argument groups to an existing argparser"""
 
     # defaults from environment vars or calculated vals
-    def_vault_basedir = os.environ.get('OBSIDIAN_VAULT_BASEDIR', _default_vault_parent_dir())
+    def_vault_basedir = os.environ.get('OBSIDIAN_VAULT_BASEDIR')
+    if def_vault_basedir is None:
+        def_vault_basedir = _default_vault_parent_dir()  # only probe the filesystem when needed
     def_vault_name = os.environ.get('OBSIDIAN_VAULT_NAME', None)
     def_vault = os.environ.get('OBSIDIAN_VAULT', None)
     def_note_folder = os.environ.get('OBSIDIAN_NOTE_FOLDER', '')
@@ -65,7 +69,7 @@ def argparse_epilog() -> str:
     return epilog
 
 
-def new_note_frontmatter(created_ts: float = 0.0, updated_ts: float = 0.0, tags: list[str] = []) -> str:
+def new_note_frontmatter(created_ts: float = 0.0, updated_ts: float = 0.0, tags: list[str] | None = None) -> str:
     """Returns a markdown frontmatter string for a new note with the given title and date"""
     if created_ts == 0.0:
         created_ts = datetime.datetime.now().timestamp()
@@ -74,29 +78,28 @@ def new_note_frontmatter(created_ts: float = 0.0, updated_ts: float = 0.0, tags:
     created_str = _timestamp_format(created_ts)
     updated_str = _timestamp_format(updated_ts)
 
-    frontmatter = f"""---
+    parts = [f"""---
 created: {created_str}
 created-ts: {created_ts}
 updated: {updated_str}
 updated-ts: {updated_ts}
 document-type: copilot chat
-"""
-    # add tags
-    if len(tags) > 0:
-        tags.insert(0, 'tags:')  # 0th element is the 'tags:' line
-        tags_str = "\n  - ".join(tags)
-        frontmatter += f"{tags_str}\n"
+"""]
+    # add tags; the caller's list is not modified
+    if tags:
+        parts.append("tags:\n  - " + "\n  - ".join(tags) + "\n")
 
-    frontmatter += "---\n\n"
-    return frontmatter
+    parts.append("---\n\n")
+    return "".join(parts)
 
 
+@functools.lru_cache(maxsize=4096)
 def _timestamp_format(ts: float) -> str:
     """returns a formatted timestamp string"""
-    dt = datetime.datetime.fromtimestamp(ts)
-    return dt.strftime('%Y-%m-%d %H:%M:%S')
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))  # no datetime object needed
 
 
+@functools.lru_cache(maxsize=1)
 def _default_vault_parent_dir() -> str | None:
     """Returns the default parent directory for Obsidian vaults, or None if not found"""
     candidates = ['Documents', 'My Documents']  # in priority order
@@ -142,15 +145,16 @@ class Vault():
 
     def _verify_vault(self, vault_dir: str) -> None:
         """Verifies that the directory looks like a valid Obsidian vault"""
-        # check for .obsidian directory
+        # a workspace.json file in .obsidian implies the .obsidian directory,
+        # so that directory is only checked to explain a failure
         obsidian_dir = os.path.join(vault_dir, '.obsidian')
+        workspace_json = os.path.join(obsidian_dir, 'workspace.json')
+        if os.path.isfile(workspace_json):
+            return
+
         if not os.path.isdir(obsidian_dir):
             raise ObsidianValidationError(f"not a valid Obsidian vault; missing .obsidian directory: {vault_dir}")
-
-        # check for workspace.json file in .obsidian
-        workspace_json = os.path.join(obsidian_dir, 'workspace.json')
-        if not os.path.isfile(workspace_json):
-            raise ObsidianValidationError(f"not a valid Obsidian vault; missing workspace.json file: {obsidian_dir}")
+        raise ObsidianValidationError(f"not a valid Obsidian vault; missing workspace.json file: {obsidian_dir}")
 
 
     def _vault_full_path(self, vault: str | None = None, vault_name: str | None = None, vault_basedir: str | None = None) -> str | None:
@@ -183,7 +187,7 @@ class Vault():
             note = os.path.join(vault_dir, note_folder, note_title)
 
         # add .md extension if not present
-        if note[-2:] != '.md':
+        if not note.endswith('.md'):
             note += ".md"
         if len(note) < 4:  # at least one char plus ".md"
             return None
@@ -7,54 +7,113 @@ Copyright (c) 2025 by Eric Dey. All rights reserved.
 
 from __future__ import annotations  # for forward references in type hints
 
-import json
+import concurrent.futures
 import logging
 import os
-from typing import Iterator
+from operator import attrgetter
+from typing import Any, Iterator
 
-from ChatSession import Chat
+from ChatSession import CHAT_LOAD_PARALLEL_ENV_VAR, SESSION_FILE_EXTENSIONS, Chat, load_chats
+from JsonUtils import json_loads
 
 
 # Logger; may be overridden by users of this module
 Log = logging.getLogger(__file__)
 Log_Default_Format = '%(levelname)s %(name)s: %(message)s'
 
+# minimum number of workspace folders before Workspaces.refresh() reads them in threads
+THREAD_POOL_MIN_WORKSPACES = 4
+THREAD_POOL_MAX_WORKERS = 16
+
 
 class WorkspaceNoChatSessions(Exception):
     """Raised when a workspace does not contain any chat sessions"""
     pass
 
 
-class Workspaces:
+class _IdPrefixIndex:
+    """
+    Prefix trie over object ids. Each node holds the first object, in list
+    order, whose id passes through it, so a lookup returns the same object as
+    a linear startswith() scan of the list.
+    """
+    _FIRST = ''  # node key for the first matching object; never a single id character
+
+    def __init__(self, objects: list) -> None:
+        self.root: dict = {}
+        for obj in objects:
+            node = self.root
+            node.setdefault(self._FIRST, obj)
+            for ch in obj.id:
+                node = node.setdefault(ch, {})
+                node.setdefault(self._FIRST, obj)
+
+
+    def find(self, prefix: str) -> Any:
+        """returns the first object whose id starts with prefix, or None"""
+        node = self.root
+        for ch in prefix:
+            node = node.get(ch)
+            if node is None:
+                return None
+        return node.get(self._FIRST)
+
+
+def _split_sort_spec(sortBy: str) -> tuple[str, bool]:
+    """splits a sort specification into (attribute name, reverse); '-name' sorts descending"""
+    if sortBy.startswith('-'):
+        return sortBy[1:], True
+    return sortBy, False
+
+
+def _load_workspace(storageDir: str) -> Workspace | Exception:
+    """builds a Workspace; expected load failures are returned instead of raised"""
+    try:
+        return Workspace(storageDir)
+    except (WorkspaceNoChatSessions, ValueError) as e:
+        return e
+
+
+def _load_workspaces(storageDirs: list[str]) -> list[Workspace | Exception]:
+    """
+    Builds a Workspace for each storage directory, in order. Construction is
+    mostly stat and small file reads, so larger batches overlap them in threads.
+    """
+    if len(storageDirs) < THREAD_POOL_MIN_WORKSPACES or os.environ.get(CHAT_LOAD_PARALLEL_ENV_VAR, '') == '0':
+        return [_load_workspace(d) for d in storageDirs]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(THREAD_POOL_MAX_WORKERS, len(storageDirs))) as executor:
+        return list(executor.map(_load_workspace, storageDirs))
 
-    def __init__(self, workspaceStorageDir: str, sortBy: str = '') -> None:
-        # Configure logging only if it hasn't been configured yet
-        logging.basicConfig(format=Log_Default_Format, force=False)
 
+class Workspaces:
+
+    def __init__(self, workspaceStorageDir: str, sortBy: str = '', onlyId: str = '') -> None:
         self.storageDir = workspaceStorageDir  # directory existence checked in refresh()
-        self._sortAttribute = sortBy  # workspaces sorting attribute name
-        self._sortReverse = False  # sort descending if attribute name starts with '-'
+        self._onlyId = onlyId.strip().lower().rstrip('.')  # only load workspaces with this ID prefix
+        self._sortAttribute, self._sortReverse = _split_sort_spec(sortBy)  # workspaces sort specification
         self.workspaces = []  # list of Workspace objects
+        self._idIndex: _IdPrefixIndex | None = None  # built on first find()
         self.refresh()  # read the workspaces from the filesystem
 
 
     def refresh(self, sortBy: str = '') -> None:
         """updates the workspaces information from the filesystem"""
         self.workspaces = []
+        self._idIndex = None
 
         if not os.path.exists(self.storageDir):
             Log.error(f"basePath does not exist: {self.storageDir}")
             return
 
-        workspaceDirs = [d for d in os.listdir(self.storageDir) if os.path.isdir(os.path.join(self.storageDir, d))]
-        for d in workspaceDirs:
-            try:
-                w = Workspace(os.path.join(self.storageDir, d))
+        with os.scandir(self.storageDir) as entries:
+            workspaceDirs = [e for e in entries if e.name.startswith(self._onlyId) and e.is_dir()]
+        for d, w in zip(workspaceDirs, _load_workspaces([d.path for d in workspaceDirs])):
+            if isinstance(w, WorkspaceNoChatSessions):
+                Log.debug(w)
+            elif isinstance(w, ValueError):
+                Log.warning(f'skipping invalid workspace directory "{d.name}": {w}')
+            else:
                 self.workspaces.append(w)
-            except WorkspaceNoChatSessions as e:
-                Log.debug(e)
-            except ValueError as e:
-                Log.warning(f'skipping invalid workspace directory "{d}": {e}')
 
         self.sort(sortBy)  # sort the workspaces list
 
@@ -62,31 +121,26 @@ class Workspaces:
     def sort(self, sortBy: str = ''):
         """Sorts the workspaces list by the given attribute name."""
         if sortBy != '':
-            self._sortAttribute = sortBy  # update sorting attribute
+            self._sortAttribute, self._sortReverse = _split_sort_spec(sortBy)  # update sorting attribute
 
         if self._sortAttribute == '':
             return
 
-        # pull out the reverse flag if specified
-        if self._sortAttribute.startswith('-'):
-            self._sortReverse = True
-            self._sortAttribute = self._sortAttribute[1:]
-
         # **TODO**: implement fuzzy matching of attribute names w/difflib
         if self._sortAttribute not in Workspace.sorting_attributes():
             Log.warning(f'Invalid sort attribute for Workspace: {self._sortAttribute}')
             return
 
-        self.workspaces.sort(key=lambda w: getattr(w, self._sortAttribute), reverse=self._sortReverse)
+        self.workspaces.sort(key=attrgetter(self._sortAttribute), reverse=self._sortReverse)
+        self._idIndex = None  # first match for a prefix depends on the order
 
 
     def find(self, id: str) -> Workspace | None:
         """finds a workspace by its ID; supports truncated IDs ending with ..."""
         workspace_id = id.strip().lower().rstrip('.')
-        for w in self.workspaces:
-            if w.id.startswith(workspace_id):
-                return w
-        return None
+        if self._idIndex is None:
+            self._idIndex = _IdPrefixIndex(self.workspaces)
+        return self._idIndex.find(workspace_id)
 
 
     def __len__(self):
@@ -107,22 +161,23 @@ class Workspace:
 
 
     def __init__(self, storageDir: str, sortBy: str = '') -> None:
-        # Configure logging only if it hasn't been configured yet
-        logging.basicConfig(format=Log_Default_Format, force=False)
-
         self.storageDir = storageDir
-        if not os.path.exists(self.storageDir):
+        try:
+            storageStat = os.stat(self.storageDir)
+        except OSError:
             raise ValueError(f"workspace folder does not exist: {self.storageDir}")
 
         self.chatSessionsFolder = os.path.join(self.storageDir, "chatSessions")
         if not os.path.exists(self.chatSessionsFolder):
             raise WorkspaceNoChatSessions(f"workspace does not contain any chat sessions: {self.chatSessionsFolder}")
 
-        self._sortAttribute = sortBy  # chats sorting attribute name
-        self._sortReverse = False  # sort descending if attribute name starts with '-'
-        self.created = os.path.getctime(storageDir)
+        self._sortAttribute, self._sortReverse = _split_sort_spec(sortBy)  # chats sort specification
+        self.created = storageStat.st_ctime
         self.updated = self.created  # default until we find chat sessions
-        self.chats: list[Chat] = []  # chat objects
+        self.chatCount = 0  # number of chat session files
+        self._sessionFiles: list[str] = []  # chat session file paths
+        self._chats: list[Chat] | None = None  # chat objects; loaded on first access of chats
+        self._idIndex: _IdPrefixIndex | None = None  # built on first find()
         self.folder = ''  # project directory this workspace is associated with
         self.id = os.path.basename(self.storageDir)  # id is the storageDir name
 
@@ -134,66 +189,101 @@ class Workspace:
 
         self.metadata = {}
         metadataFile = os.path.join(self.storageDir, "workspace.json")
-        if not os.path.exists(metadataFile):
-            Log.warning(f"workspace metadata file does not exist: {metadataFile}")
-        else:
-            with open(metadataFile, "r") as sessionFile:
-                self.metadata = json.load(sessionFile)
+        try:
+            with open(metadataFile, "rb") as sessionFile:
+                self.metadata = json_loads(sessionFile.read())
             self.folder = self.metadata.get('folder', '')
+        except FileNotFoundError:
+            Log.warning(f"workspace metadata file does not exist: {metadataFile}")
 
-        if not os.path.exists(self.chatSessionsFolder):
+        # scan directory for chat session files; DirEntry caches the stat result
+        try:
+            with os.scandir(self.chatSessionsFolder) as entries:
+                sessionFiles = [e for e in entries
+                                if os.path.splitext(e.name)[1].lower() in SESSION_FILE_EXTENSIONS and e.is_file()]
+        except FileNotFoundError:
             Log.error(f"chatSessionsFolder does not exist: {self.chatSessionsFolder}")
             self.updated = self.created
             return
 
         self.updated = self.created  # default until we find chat sessions
+        self.chatCount = 0
+        self._sessionFiles = []
+        self._chats = None  # reload chats on next access
+        self._idIndex = None
 
-        # scan directory for chat session files
-        sessionFiles = [f for f in os.listdir(self.chatSessionsFolder) if os.path.isfile(os.path.join(self.chatSessionsFolder, f))]
         if not sessionFiles:
             return  # stop since no chat sessions files found
 
-        file_dates = [(f, os.path.getctime(os.path.join(self.chatSessionsFolder, f))) for f in sessionFiles]
-        self.updated = max(file_dates, key=lambda x: x[1])[1]
-
-        # load chat sessions
-        self.chats = []
-        for sessionFile in sessionFiles:
-            try:
-                full_path = os.path.join(self.chatSessionsFolder, sessionFile)
-                chat = Chat(full_path, workspaceId=self.id)
-                self.chats.append(chat)
-            except Exception as e:
-                Log.warning(f"failed to load chat session from file {sessionFile}: {e}")
+        self.updated = max(e.stat().st_ctime for e in sessionFiles)
+        self._sessionFiles = [e.path for e in sessionFiles]
+        self.chatCount = len(self._sessionFiles)
 
         self.sort(sortBy)  # sort chats by the specified attribute name
 
 
+    @property
+    def chats(self) -> list[Chat]:
+        """chat objects; the session files are parsed on first access"""
+        if self._chats is None:
+            return self.load()
+        return self._chats
+
+
+    def load(self) -> list[Chat]:
+        """parses the session files now, logging any that fail to load, and returns the chats"""
+        chats: list[Chat] = []
+        sessionArgs = [(f, 0.0, self.id) for f in self._sessionFiles]
+        for sessionFile, chat in zip(self._sessionFiles, load_chats(sessionArgs)):
+            if isinstance(chat, Exception):
+                Log.warning(f"failed to load chat session from file {os.path.basename(sessionFile)}: {chat}")
+            else:
+                chats.append(chat)
+        self._chats = chats
+        self._sort_chats()
+        return chats
+
+
     def sort(self, sortBy: str = ''):
         """Sorts the chats list by the given attribute name."""
         if sortBy != '':
-            self._sortAttribute = sortBy  # update sorting attribute
+            self._sortAttribute, self._sortReverse = _split_sort_spec(sortBy)  # update sorting attribute
 
         if self._sortAttribute == '':
             return
 
-        # pull out the reverse flag if specified
-        if self._sortAttribute.startswith('-'):
-            self._sortReverse = True
-            self._sortAttribute = self._sortAttribute[1:]
-
         # **TODO**: implement fuzzy matching of attribute names w/difflib
         if self._sortAttribute not in Chat.sorting_attributes():
             Log.warning(f'Invalid sort attribute for Chat: {self._sortAttribute}')
             return
 
-        self.chats.sort(key=lambda c: getattr(c, self._sortAttribute), reverse=self._sortReverse)
+        if self._chats is not None:
+            self._sort_chats()  # otherwise sorted when the chats are loaded
+
+
+    def _sort_chats(self) -> None:
+        """sorts the loaded chats by the current sorting attribute, if it is valid"""
+        if self._chats is not None and self._sortAttribute in Chat.sorting_attributes():
+            self._chats.sort(key=attrgetter(self._sortAttribute), reverse=self._sortReverse)
+            self._idIndex = None  # first match for a prefix depends on the order
 
 
     def find(self, id: str) -> Chat | None:
         """finds a chat session by its ID; supports truncated IDs ending with ..."""
         chat_id = id.strip().lower().rstrip('.')
-        for c in self.chats:
-            if c.id.startswith(chat_id):
-                return c
-        return None
+
+        # unsorted chats are in session file order and a session file's chat ID
+        # is its file name, so only the matching sessions need to be parsed
+        if self._chats is None and self._sortAttribute not in Chat.sorting_attributes():
+            for sessionFile in self._sessionFiles:
+                if not os.path.splitext(os.path.basename(sessionFile))[0].startswith(chat_id):
+                    continue
+                chat = load_chats([(sessionFile, 0.0, self.id)])[0]
+                if not isinstance(chat, Exception):
+                    return chat
+                Log.warning(f"failed to load chat session from file {os.path.basename(sessionFile)}: {chat}")
+            return None
+
+        if self._idIndex is None:
+            self._idIndex = _IdPrefixIndex(self.chats)
+        return self._idIndex.find(chat_id)
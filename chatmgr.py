@@ -10,22 +10,24 @@ Created: September 2025
 from __future__ import annotations
 
 import argparse
-import datetime
-import json
+import functools
 import logging
 import os
 import shlex
 import sys
+import time
 import urllib.parse
-from typing import Optional, TextIO
-
-from rich.console import Console
-from rich.markdown import Markdown
+from typing import TYPE_CHECKING, Iterable, Optional, TextIO
 
 import Obsidian
 import Workspace
 from ArgparseUtils import RawDescriptionHelpFormatterWithLineWrap
 
+# rich is imported where console output is rendered; plain text and file
+# output, --parse-only, and sortkeys never need it
+if TYPE_CHECKING:
+    from rich.console import Console
+
 
 # Defaults values for arg parsing
 Defaults = {
@@ -37,18 +39,41 @@ Defaults = {
     'sanitizeMarkdown': True,
 }
 
+# write buffer size in bytes for --output files, which are written in large blocks
+Output_Buffer_Size: int = 1024 * 1024
+
+# OS specific default workspace path; resolved once since the platform can't change
+Default_Workspace_Dir = None
+if sys.platform == 'win32':
+    Default_Workspace_Dir = os.path.join(Defaults['userHomeDir'], Defaults['workspaceDirRelWindows'])
+elif sys.platform == 'darwin':
+    Default_Workspace_Dir = os.path.join(Defaults['userHomeDir'], Defaults['workspaceDirRelMac'])
+elif sys.platform == 'linux':
+    Default_Workspace_Dir = os.path.join(Defaults['userHomeDir'], Defaults['workspaceDirRelLinux'])
+
+
+# Replacements of non-standard apostrophes and quotes with ASCII equivalents
+Sanitize_Table = str.maketrans({
+    '\u2019': "'",   # right single quotation mark
+    '\u2018': "'",   # left single quotation mark
+    '\u201c': '"',   # left double quotation mark
+    '\u201d': '"',   # right double quotation mark
+})
+
+# characters that make shlex.split() do more than return an argument as-is
+Shell_Split_Chars = frozenset(' \t\r\n\x0b\x0c"\'\\')
+
+
+@functools.lru_cache(maxsize=None)
+def markdown_console() -> Console:
+    """returns the Console for rendered markdown output; shared since construction probes the terminal"""
+    from rich.console import Console
+    return Console()
+
 
 def sanitize_md_text(text: str) -> str:
     # Replace non-standard apostrophes and quotes with ASCII equivalents
-    replacements = {
-        '\u2019': "'",   # right single quotation mark
-        '\u2018': "'",   # left single quotation mark
-        '\u201c': '"',   # left double quotation mark
-        '\u201d': '"',   # right double quotation mark
-    }
-    for orig, repl in replacements.items():
-        text = text.replace(orig, repl)
-    return text
+    return text.translate(Sanitize_Table)
 
 
 def markdown_output(
@@ -69,22 +94,82 @@ def markdown_output(
         sanitize: if True, sanitizes the markdown text before writing
         outputFD: if not None, writes to this open file descriptor
     """
+    if not printText:
+        return
+
     if sanitize:
         markdown = sanitize_md_text(markdown)
 
     # file output without console formatting
-    if outputFD is not None and printText:
+    if outputFD is not None:
         outputFD.write(markdown)
         outputFD.write('\n')  # only needed for file output
         return
 
     # console output
-    md = Markdown(markdown)
-    if printText:
-        Console().print(md)
+    from rich.markdown import Markdown
+    markdown_console().print(Markdown(markdown))
     return
 
 
+def markdown_output_parts(
+    parts: list[str],
+    printText: bool = True,
+    sanitize: bool = False,
+    outputFD: Optional[TextIO] = None,
+) -> None:
+    """
+    Write markdown text given as consecutive parts; the output is the same as
+    markdown_output(''.join(parts)). File output writes the parts one at a
+    time so that large parts, such as raw JSON, are not copied into one string.
+
+    Args:
+        parts: the markdown text fragments to output
+        printText: if True, prints the markdown text; if False, does not print
+        sanitize: if True, sanitizes the markdown text before writing
+        outputFD: if not None, writes to this open file descriptor
+    """
+    if not printText:
+        return
+
+    if outputFD is not None:
+        for part in parts:
+            outputFD.write(sanitize_md_text(part) if sanitize else part)
+        outputFD.write('\n')  # only needed for file output
+        return
+
+    markdown_output(''.join(parts), printText=printText, sanitize=sanitize, outputFD=outputFD)
+
+
+def table_output(headers: list[str], rows: Iterable[Iterable[str]], printText: bool = True) -> None:
+    """
+    Write a table to the console styled like a rendered markdown table. The
+    table is built directly so the rows don't go through the markdown parser.
+
+    Args:
+        headers: the column headings
+        rows: the cell text for each row; cells are not parsed as markdown or markup
+        printText: if True, prints the table; if False, does not print
+    """
+    if not printText:
+        return
+
+    from rich import box
+    from rich.table import Table
+    from rich.text import Text
+
+    table = Table(box=box.SIMPLE, pad_edge=False, style='markdown.table.border', show_edge=True, collapse_padding=True)
+    for heading in headers:
+        headingText = Text(heading)
+        headingText.stylize('markdown.table.header')
+        table.add_column(headingText)
+    for row in rows:
+        table.add_row(*(Text(cell) for cell in row))
+    console = markdown_console()
+    console.line()  # blank line before the table, as between markdown blocks
+    console.print(table)
+
+
 def elipsis_id(id: str, begin: int = 6, end: int = 0) -> str:
     """returns an elipsized version of a workspace id"""
     if len(id) < begin + end + 4:
@@ -92,43 +177,42 @@ def elipsis_id(id: str, begin: int = 6, end: int = 0) -> str:
     return id[:begin] + '...' + id[-end:] if end else id[:begin] + '...'
 
 
+@functools.lru_cache(maxsize=512)
 def folder_url_format(folder: str) -> str:
     """returns a folder path formatted for URL use"""
     name = urllib.parse.unquote(folder)
     return name.replace('file:///', '')
 
 
+@functools.lru_cache(maxsize=4096)
 def timestamp_format(ts: float) -> str:
     """returns a formatted timestamp string"""
-    dt = datetime.datetime.fromtimestamp(ts)
-    return dt.strftime('%Y-%m-%d %H:%M:%S')
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))  # no datetime object needed
 
 
-def load_workspaces(storageDir: str, sortBy: str = '') -> Workspace.Workspaces:
-    """loads the workspaces from the given storage directory"""
-    return Workspace.Workspaces(storageDir, sortBy=sortBy)
+def load_workspaces(storageDir: str, sortBy: str = '', onlyId: str = '') -> Workspace.Workspaces:
+    """loads the workspaces from the given storage directory; optionally only those matching an ID prefix"""
+    return Workspace.Workspaces(storageDir, sortBy=sortBy, onlyId=onlyId)
 
 
 def print_workspace_summary(workspaces: Workspace.Workspaces) -> None:
     """prints a summary of the workspaces and their chat sessions"""
     md = '# Available Workspaces\n'
     md += f'**Workspace storage:** {folder_url_format(workspaces.storageDir)}  \n'
-    md += f'**Workspaces with chat sessions:** {len(workspaces)}\n\n'
-    md += '| ID | Workspace Folder | Created | Updated | Chats |\n'
-    md += '|----|------------------|---------|---------|-------|\n'
-    for w in workspaces:
-        md += f'| {elipsis_id(w.id)} | {folder_url_format(w.folder)} | {timestamp_format(w.created)} | {timestamp_format(w.updated)} | {len(w.chats)} |\n'
+    md += f'**Workspaces with chat sessions:** {len(workspaces)}\n'
     markdown_output(md, printText=True)
+    table_output(['ID', 'Workspace Folder', 'Created', 'Updated', 'Chats'],
+                 ((elipsis_id(w.id), folder_url_format(w.folder), timestamp_format(w.created), timestamp_format(w.updated), str(w.chatCount))
+                  for w in workspaces),
+                 printText=True)
 
 
 def print_sortkeys(workspace: bool = True, chat: bool = True) -> None:
     """prints the available sort keys for workspaces and chats"""
     if workspace:
-        print('Workspace sort keys:', end=' ')
-        print(', '.join(Workspace.Workspace.sorting_attributes()))
+        print(f"Workspace sort keys: {', '.join(Workspace.Workspace.sorting_attributes())}")
     if chat:
-        print('Chat sort keys:', end=' ')
-        print(', '.join(Workspace.Chat.sorting_attributes()))
+        print(f"Chat sort keys: {', '.join(Workspace.Chat.sorting_attributes())}")
 
 
 def mode_global(options: argparse.Namespace) -> None:
@@ -140,7 +224,13 @@ def mode_global(options: argparse.Namespace) -> None:
 
     if options.cmd == 'list' or options.cmd == 'view':
         workspaces = load_workspaces(options.workspaceStorageDir, sortBy=options.sort)
-        print_workspace_summary(workspaces) if options.printmd else None
+        if options.printmd:
+            print_workspace_summary(workspaces)
+        else:
+            # parse-only mode; the summary only counts session files, so
+            # parse each workspace's sessions to report failures
+            for w in workspaces.workspaces:
+                w.load()
         return
 
     options.log.error(f'invalid command: {options.cmd}')
@@ -154,7 +244,7 @@ def mode_workspace(options: argparse.Namespace) -> None:
         print_sortkeys(workspace=False, chat=True)
         return
 
-    workspaces = load_workspaces(options.workspaceStorageDir)
+    workspaces = load_workspaces(options.workspaceStorageDir, onlyId=options.workspace)
     selected_workspace = workspaces.find(options.workspace)
     if selected_workspace is None:
         options.log.error(f'workspace not found: {options.workspace}')
@@ -170,17 +260,17 @@ def mode_workspace(options: argparse.Namespace) -> None:
     md += f'**Workspace Folder:** {folder_url_format(selected_workspace.folder or "")}  \n'
     md += f'**Created:** {timestamp_format(selected_workspace.created)}  \n'
     md += f'**Last Updated:** {timestamp_format(selected_workspace.updated)}  \n'
-    md += f'**Chat Sessions:** {len(selected_workspace.chats)}\n\n'
-    md += '| Chat ID | Created | Updated | Requests | Size |\n'
-    md += '|---------|---------|---------|----------|------|\n'
-    for chat in selected_workspace.chats:
-        md += f'| {elipsis_id(chat.id or "")} | {timestamp_format(chat.created)} | {timestamp_format(chat.updated)} | {len(chat)} | {chat.size} |\n'
+    md += f'**Chat Sessions:** {len(selected_workspace.chats)}\n'
     markdown_output(md, printText=printMarkdown)
+    table_output(['Chat ID', 'Created', 'Updated', 'Requests', 'Size'],
+                 ((elipsis_id(chat.id or ""), timestamp_format(chat.created), timestamp_format(chat.updated), str(len(chat)), str(chat.size))
+                  for chat in selected_workspace.chats),
+                 printText=printMarkdown)
 
 
 def mode_chat(options: argparse.Namespace) -> None:
     """handle chat mode (workspace and chat specified)"""
-    workspaces = load_workspaces(options.workspaceStorageDir)
+    workspaces = load_workspaces(options.workspaceStorageDir, onlyId=options.workspace)
     selected_workspace = workspaces.find(options.workspace)
     if selected_workspace is None:
         options.log.error(f'workspace not found: {options.workspace}')
@@ -191,46 +281,49 @@ def mode_chat(options: argparse.Namespace) -> None:
         options.log.error(f'chat session not found in workspace {options.workspace}: {options.chat}')
         return
 
+    # parse-only mode; the chat has been parsed and nothing is printed
+    if not options.printmd:
+        return
+
     output_kwargs = {
         'printText': options.printmd,
         'outputFD': options.outputFD,
     }
     sanitizeText = options.sanitize
 
-    md = ''  # markdown output string
+    parts = []  # markdown output fragments
 
     if options.obsidian:
-        md += Obsidian.new_note_frontmatter(selected_chat.created,
-                                            selected_chat.updated,
-                                            tags=['CopilotAI'])
-
-    md += '# Chat Session Details\n'
-    md += f'**Workspace ID:** {selected_workspace.id}  \n'
-    md += f'**Chat ID:** {selected_chat.id}  \n'
-    md += f'**Format:** {selected_chat.format_type.capitalize()} v{selected_chat.format_version}  \n'
-    md += f'**Created:** {timestamp_format(selected_chat.created)}  \n'
-    md += f'**Updated:** {timestamp_format(selected_chat.updated)}  \n'
-    md += f'**Size (chars):** {selected_chat.size}  \n'
-    md += f'**Requests:** {len(selected_chat)}\n'
-    markdown_output(md, **output_kwargs)
+        parts.append(Obsidian.new_note_frontmatter(selected_chat.created,
+                                                   selected_chat.updated,
+                                                   tags=['CopilotAI']))
+
+    parts += [
+        '# Chat Session Details\n',
+        f'**Workspace ID:** {selected_workspace.id}  \n',
+        f'**Chat ID:** {selected_chat.id}  \n',
+        f'**Format:** {selected_chat.format_type.capitalize()} v{selected_chat.format_version}  \n',
+        f'**Created:** {timestamp_format(selected_chat.created)}  \n',
+        f'**Updated:** {timestamp_format(selected_chat.updated)}  \n',
+        f'**Size (chars):** {selected_chat.size}  \n',
+        f'**Requests:** {len(selected_chat)}\n',
+    ]
+    markdown_output(''.join(parts), **output_kwargs)
     markdown_output('&nbsp;', **output_kwargs)
 
     if options.raw:
         for i, r in enumerate(selected_chat.requests):
             title = f"## Request {i+1} (raw JSON input):\n"
-            quotedJson = '```\n' + r.rawRequest + '\n```\n'
-            markdown_output(title + quotedJson, **output_kwargs, sanitize=sanitizeText)
+            markdown_output_parts([title, '```\n', r.rawRequest, '\n```\n'], **output_kwargs, sanitize=sanitizeText)
             title = f"## Copilot Response {i+1} (raw JSON input):\n"
-            quotedJson = '```\n' + r.rawResponse + '\n```\n'
-            markdown_output(title + quotedJson, **output_kwargs, sanitize=sanitizeText)
+            markdown_output_parts([title, '```\n', r.rawResponse, '\n```\n'], **output_kwargs, sanitize=sanitizeText)
             markdown_output('\n---\n', **output_kwargs)
         return
 
     if options.raw_all:
         for i, r in enumerate(selected_chat.requests):
             title = f"## Request & Response {i+1} (raw JSON input):\n"
-            quotedJson = '```\n' + json.dumps(r.requestDict, indent=2) + '\n```\n'
-            markdown_output(title + quotedJson, **output_kwargs, sanitize=sanitizeText)
+            markdown_output_parts([title, '```\n', r.rawJson, '\n```\n'], **output_kwargs, sanitize=sanitizeText)
             markdown_output('\n---\n', **output_kwargs)
         return
 
@@ -246,14 +339,7 @@ def mode_chat(options: argparse.Namespace) -> None:
 def main(argv: list[str]) -> int:
     me = os.path.basename(argv[0])
 
-    # OS specific default workspace path
-    def_workspace = None
-    if sys.platform == 'win32':
-        def_workspace = os.path.join(Defaults['userHomeDir'], Defaults['workspaceDirRelWindows'])
-    elif sys.platform == 'darwin':
-        def_workspace = os.path.join(Defaults['userHomeDir'], Defaults['workspaceDirRelMac'])
-    elif sys.platform == 'linux':
-        def_workspace = os.path.join(Defaults['userHomeDir'], Defaults['workspaceDirRelLinux'])
+    def_workspace = Default_Workspace_Dir
 
     description = 'GitHub Copilot chat manager tool.'
 
@@ -275,7 +361,9 @@ def main(argv: list[str]) -> int:
     # Special case handling for VSCode launch.json argsExpand option
     if len(argv) > 1 and argv[1] == '--argsExpand':
         argv.pop(1)  # remove --argsExpand
-        if len(argv) > 1:  # still have args to expand
+        # non-empty args without whitespace, quotes or escapes are already
+        # split as shlex would split them, so only lex when one needs it
+        if any(not arg or not Shell_Split_Chars.isdisjoint(arg) for arg in argv[1:]):
             additionalArgs = ' '.join(argv[1:])
             argv = argv[:1] + shlex.split(additionalArgs)
 
@@ -336,8 +424,11 @@ def main(argv: list[str]) -> int:
     options.sanitize = not options.no_sanitize
 
     # setup logging
+    # the handler is only created on the first call; later calls, e.g. from
+    # tests, keep it and just update the level
     log_level = logging.DEBUG if options.verbose else logging.INFO
-    logging.basicConfig(level=log_level, format='%(levelname)s %(name)s: %(message)s', force=True)
+    logging.basicConfig(format='%(levelname)s %(name)s: %(message)s')
+    logging.getLogger().setLevel(log_level)
     options.log = logging.getLogger(me)
 
     # Checking after this point is for single-shot execution where
@@ -393,7 +484,7 @@ def main(argv: list[str]) -> int:
         if options.output == '-':
             options.outputFD = sys.stdout  # MD without console formatting
         else:
-            options.outputFD = open(options.output, 'w', encoding='utf-8')
+            options.outputFD = open(options.output, 'w', encoding='utf-8', buffering=Output_Buffer_Size)
 
     # error help message
     if options.chat is not None and options.workspace is None:
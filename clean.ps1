@@ -7,4 +7,5 @@ Push-Location $(Split-Path -Path $MyInvocation.MyCommand.Definition -Parent) -Er
 
 # Remove build artifacts
 Remove-Item -Recurse -Force build, dist, *.egg-info -ErrorAction SilentlyContinue
+Remove-Item -Force *.so, *.pyd -ErrorAction SilentlyContinue  # mypyc extension modules
 Get-ChildItem -Recurse -Directory -Filter '__pycache__' | Remove-Item -Recurse -Force -ErrorAction SilentlyContinue
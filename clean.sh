@@ -7,4 +7,5 @@ MYDIR=$(cd "$(dirname "$0")" && pwd)
 
 cd "$MYDIR" || exit 1  # do or do not, there is no try
 rm -r build/ dist/ *.egg-info  2> /dev/null
+rm -f ./*.so ./*.pyd  # mypyc extension modules
 find . -type d -name '__pycache__' -print0 | xargs -0 rm -r
@@ -1,9 +1,20 @@
+import os
+
 from setuptools import setup
 
+# Optionally compile the request parser with mypyc for faster session loading;
+# enable with CHATMGR_USE_MYPYC=1 (requires mypy). The pure Python module is
+# used whenever the compiled extension is not built.
+ext_modules = []
+if os.environ.get('CHATMGR_USE_MYPYC', '') == '1':
+    from mypyc.build import mypycify
+    ext_modules = mypycify(['--follow-imports=silent', '--explicit-package-bases', 'ChatRequest.py'])
+
 setup(
     entry_points={
         'console_scripts': [
             'chatmgr=chatmgr:main',
         ],
     },
+    ext_modules=ext_modules,
 )
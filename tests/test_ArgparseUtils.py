@@ -57,6 +57,14 @@ class ArgparseUtilsTests(unittest.TestCase):
         output = formatter._fill_text(input_text, 80, "")
         self.assertEqual(output, expected_output)
 
+    def test_mixed_rules_in_one_text(self):
+        """Test that indented paragraphs, forced breaks, and tabs combine correctly"""
+        formatter = RawDescriptionHelpFormatterWithLineWrap('unittest')
+        input_text = "\n    First\tparagraph\n    continues here.\n\n    Forced \n    break.\n    \n  Last.\n"
+        expected_output = "First paragraph continues here.\n\nForced\nbreak.\n\nLast."
+        output = formatter._fill_text(input_text, 80, "")
+        self.assertEqual(output, expected_output)
+
     def test_line_wrapping(self):
         """Test that long lines are wrapped"""
         formatter = RawDescriptionHelpFormatterWithLineWrap('unittest')
@@ -79,6 +79,20 @@ class ChatRequestTests(unittest.TestCase):
         self.assertEqual(req.response, "")
         self.assertEqual(req.rawResponse, "[]")
 
+    def test_raw_json_bytes(self):
+        """Check that the raw JSON bytes and str properties agree"""
+        input_json = {
+            "message": {"text": "Caf\u00e9"},
+            "response": [{"value": "na\u00efve"}]
+        }
+        req = Request(input_json)
+        self.assertEqual(req.rawRequestBytes, b'"Caf\\u00e9"')
+        self.assertEqual(req.rawRequest, req.rawRequestBytes.decode('utf-8'))
+        self.assertEqual(json.loads(req.rawResponseBytes), input_json["response"])
+        self.assertEqual(req.rawResponse, req.rawResponseBytes.decode('utf-8'))
+        self.assertEqual(json.loads(req.rawJsonBytes), input_json)
+        self.assertEqual(req.rawJson, req.rawJsonBytes.decode('utf-8'))
+
     def test_textEditGroup_path(self):
         """Check that textEditGroup responses are parsed correctly"""
         input_json = {
@@ -106,6 +120,22 @@ class ChatRequestTests(unittest.TestCase):
         self.assertIn("Edited file: `file.py`", req.response)
         self.assertIn(" added ", req.response)
         self.assertIn(" deleted ", req.response)
+        self.assertIn("  - added 8 chars of text, line 1 to 2\n  - deleted line 3 to 4\n", req.response)
+
+    def test_textEditGroup_single_line(self):
+        """Check that a single-line edit keeps its trailing space before the newline"""
+        input_json = {
+            "message": {"text": "Edit file"},
+            "response": [
+                {
+                    "kind": "textEditGroup",
+                    "uri": {"fsPath": "file.py"},
+                    "edits": [[{"text": "x", "range": {"startLineNumber": 2, "endLineNumber": 2}}]]
+                }
+            ]
+        }
+        req = Request(input_json)
+        self.assertEqual(req.response, "Edited file: `file.py`\n  - added 1 char of text, line 2 \n\n")
 
     def test_textEditGroup_parse_error(self):
         """Check that malformed textEditGroup responses raise parse errors"""
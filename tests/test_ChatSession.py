@@ -4,44 +4,43 @@ GitHub Copilot ChatSession object unit tests
 Copyright (c) 2025 by Eric Dey. All rights reserved.
 """
 
+import hashlib
 import json
 import os
 import sys
 import tempfile
 import unittest
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import patch
 
 # Ensure the parent directory is in sys.path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import ChatSession  # noqa: E402
+import JsonUtils  # noqa: E402
 from ChatSession import Chat  # noqa: E402
+from JsonUtils import json_dumps_canonical  # noqa: E402
 
 
 class SnapshotSessionTests(unittest.TestCase):
-    def setUp(self):
-        # Minimal valid session dict
-        self.minimal_session_dict = {
-            "requests": [
-                {"message": {"text": "Hello"}, "response": [{"value": "World"}]}
-            ]
-        }
-        self.minimal_session_str = json.dumps(self.minimal_session_dict)
-
-    def test_init_with_dict(self):
-        """Test Chat initializes with dict input"""
-        chat = Chat(self.minimal_session_dict, lastUpdate=123.45)
-        self.assertIsInstance(chat, Chat)
-        self.assertEqual(chat.created, 123.45)
-        self.assertEqual(chat.updated, 123.45)
-        self.assertIsInstance(chat.requests, list)
-        self.assertGreaterEqual(chat.size, 0)
-
-    def test_init_with_str(self):
-        """Test Chat initializes with JSON string input"""
-        chat = Chat(self.minimal_session_str, lastUpdate=42.0)
-        self.assertIsInstance(chat, Chat)
-        self.assertEqual(chat.created, 42.0)
-        self.assertEqual(chat.updated, 42.0)
+    # Minimal valid session dict; built once since no test modifies it
+    minimal_session_dict = {
+        "requests": [
+            {"message": {"text": "Hello"}, "response": [{"value": "World"}]}
+        ]
+    }
+    minimal_session_str = json.dumps(minimal_session_dict)
+
+    def test_init_with_dict_and_str(self):
+        """Test Chat initializes with dict and JSON string input"""
+        for payload, ts in ((self.minimal_session_dict, 123.45), (self.minimal_session_str, 42.0)):
+            with self.subTest(payload_type=type(payload).__name__):
+                chat = Chat(payload, lastUpdate=ts)
+                self.assertIsInstance(chat, Chat)
+                self.assertEqual(chat.created, ts)
+                self.assertEqual(chat.updated, ts)
+                self.assertIsInstance(chat.requests, list)
+                self.assertGreaterEqual(chat.size, 0)
 
     def test_init_with_invalid_type(self):
         """Test that invalid input type raises an exception"""
@@ -58,48 +57,240 @@ class SnapshotSessionTests(unittest.TestCase):
         chat3 = Chat(altered)
         self.assertNotEqual(chat1.id, chat3.id)
 
+    def test_id_matches_canonical_serialization(self):
+        """Test that the streamed id hash equals hashing the full canonical JSON"""
+        session_dict = {
+            "creationDate": 1_000_000,
+            "requests": [
+                {"message": {"text": "Hello"}, "response": [{"value": "World"}]},
+                {"message": {"text": "Again"}, "response": []},
+            ],
+        }
+        expected = hashlib.blake2b(json_dumps_canonical(session_dict), digest_size=16).hexdigest()
+        self.assertEqual(Chat(session_dict).id, expected)
+
+    def test_lone_surrogate_session(self):
+        """Test that a session with a lone UTF-16 surrogate loads and gets an id"""
+        session_str = '{"requests": [{"message": {"text": "hi \\ud83d"}, "response": [{"value": "World"}]}]}'
+        for payload in (session_str, json.loads(session_str)):
+            with self.subTest(payload_type=type(payload).__name__):
+                chat = Chat(payload)
+                self.assertEqual(chat.requests[0].request, 'hi \ud83d')
+                self.assertEqual(chat.requests[0].rawRequest, '"hi \\ud83d"')
+                self.assertEqual(len(chat.id), 32)
+
+    def test_id_independent_of_orjson(self):
+        """Test that the generated id of a JSON string doesn't depend on orjson"""
+        session_str = '{"requests": [], "creationDate": 1180591620717411303424, "ratio": 1e16}'
+        with patch.object(JsonUtils, 'orjson', None):
+            expected = Chat(session_str).id
+        self.assertEqual(Chat(session_str).id, expected)
+
     def test_id_preservation(self):
         """Test that id is preserved when provided"""
         chat = Chat(self.minimal_session_dict, id="myid123")
         self.assertEqual(chat.id, "myid123")
 
-    @patch("ChatSession.Request")
-    def test_requests_parsing_and_size(self, mock_request):
+    def test_sorting_attributes(self):
+        """Test sorting_attributes static method"""
+        attrs = Chat.sorting_attributes()
+        self.assertIsInstance(attrs, list)
+        self.assertGreater(len(attrs), 0)
+
+
+class MockedRequestSessionTests(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch("ChatSession.Request", autospec=True)  # calls must match Request()
+        self.mock_request = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requests_parsing_and_size(self):
         """Test that requests are parsed and size is computed"""
-        # Mock Request to have a .size attribute
-        mock_instance = MagicMock()
-        mock_instance.size = 7
-        mock_request.return_value = mock_instance
-        session_dict = {"requests": [{"foo": "bar"}, {"baz": "qux"}]}
+        # Request stub with only the .size attribute that Chat reads
+        mock_instance = SimpleNamespace(size=7)
+        self.mock_request.return_value = mock_instance
+        session_dict = {"requests": [{"message": {"text": "foo"}}, {"message": {"text": "bar"}}]}
         chat = Chat(session_dict)
         self.assertEqual(len(chat.requests), 2)
         self.assertEqual(chat.size, 14)
         self.assertTrue(all(r is mock_instance for r in chat.requests))
 
-    @patch("ChatSession.Request")
-    def test_len_and_iter_methods(self, mock_request):
+    def test_canceled_and_empty_requests_skipped(self):
+        """Test that canceled and empty requests are skipped without parsing"""
+        session_dict = {"requests": [
+            {"message": {"text": "canceled"}, "isCanceled": True},
+            {"message": {"text": ""}},
+            {},
+        ]}
+        chat = Chat(session_dict)
+        self.assertEqual(len(chat), 0)
+        self.mock_request.assert_not_called()
+
+    def test_len_and_iter_methods(self):
         """Test __len__ and __iter__ methods"""
-        # Prepare two mock requests
-        mock1 = MagicMock()
-        mock1.request = "req1"
-        mock1.response = "resp1"
-        mock1.size = 5
-        mock2 = MagicMock()
-        mock2.request = "req2"
-        mock2.response = "resp2"
-        mock2.size = 8
-        mock_request.side_effect = [mock1, mock2]
-        session_dict = {"requests": [{}, {}]}
+        # Prepare two request stubs
+        mock1 = SimpleNamespace(request="req1", response="resp1", size=5)
+        mock2 = SimpleNamespace(request="req2", response="resp2", size=8)
+        self.mock_request.side_effect = [mock1, mock2]
+        session_dict = {"requests": [{"message": {"text": "req1"}}, {"message": {"text": "req2"}}]}
         chat = Chat(session_dict)
         self.assertEqual(len(chat), 2)
         items = list(iter(chat))
         self.assertEqual(items, [("req1", "resp1", 5), ("req2", "resp2", 8)])
 
-    def test_sorting_attributes(self):
-        """Test sorting_attributes static method"""
-        attrs = Chat.sorting_attributes()
-        self.assertIsInstance(attrs, list)
-        self.assertGreater(len(attrs), 0)
+
+class CachedSessionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.session_bytes = json.dumps(
+            {"requests": [{"message": {"text": "Hello"}, "response": [{"value": "World"}]}]}
+        ).encode('utf-8')
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        patcher = patch.dict(os.environ, {ChatSession.CHAT_CACHE_DIR_ENV_VAR: self.cache_dir})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_from_path_uses_disk_cache_until_file_changes(self):
+        """A cached Chat is returned for an unchanged file and rebuilt after a change"""
+        session_file = os.path.join(self.cache_dir, 'session1.json')
+        with open(session_file, 'wb') as f:
+            f.write(self.session_bytes)
+        chat1 = Chat.from_path(session_file)
+        self.assertEqual(len([f for f in os.listdir(self.cache_dir) if f.endswith('.pkl')]), 1)
+
+        with patch("ChatSession.Chat.__init__", side_effect=AssertionError("file was re-parsed")):
+            chat2 = Chat.from_path(session_file)
+        self.assertEqual(list(chat2), list(chat1))
+        self.assertEqual(chat2.id, 'session1')
+
+        with open(session_file, 'wb') as f:
+            f.write(self.session_bytes.replace(b'Hello', b'Changed'))
+        os.utime(session_file, ns=(0, 1))  # mtime resolution may be coarse
+        chat3 = Chat.from_path(session_file)
+        self.assertEqual(list(chat3)[0][0], 'Changed')
+
+    def write_session(self, name='session1.json'):
+        session_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(session_dir.cleanup)
+        session_file = os.path.join(session_dir.name, name)
+        with open(session_file, 'wb') as f:
+            f.write(self.session_bytes)
+        return session_file
+
+    def cache_entries(self):
+        return [f for f in os.listdir(self.cache_dir) if f.endswith('.pkl')]
+
+    def test_cache_disabled_by_default(self):
+        """Without the environment variable nothing is cached"""
+        session_file = self.write_session()
+        with patch.dict(os.environ):
+            del os.environ[ChatSession.CHAT_CACHE_DIR_ENV_VAR]
+            with patch("ChatSession.pickle.dump", side_effect=AssertionError("cache was written")):
+                self.assertEqual(len(Chat.from_path(session_file)), 1)
+
+    def test_code_change_invalidates_cache(self):
+        """An entry made by a different version of the code is not used"""
+        session_file = self.write_session()
+        Chat.from_path(session_file)
+        with patch("ChatSession._chat_cache_code_version", return_value='other'), \
+             patch("ChatSession.Chat.__init__", side_effect=AssertionError("file was re-parsed")):
+            with self.assertRaisesRegex(AssertionError, 're-parsed'):
+                Chat.from_path(session_file)
+
+    def test_prune_removes_entries_of_deleted_sessions(self):
+        """Entries whose session file was deleted are pruned"""
+        kept_file = self.write_session('kept.json')
+        deleted_file = self.write_session('deleted.json')
+        Chat.from_path(kept_file)
+        Chat.from_path(deleted_file)
+        self.assertEqual(len(self.cache_entries()), 2)
+        os.remove(deleted_file)
+        os.remove(os.path.join(self.cache_dir, ChatSession._CHAT_CACHE_PRUNE_MARKER))
+        ChatSession._chatCachePruned.discard(self.cache_dir)
+        Chat.from_path(kept_file)
+        self.assertEqual(len(self.cache_entries()), 1)
+
+    @unittest.skipUnless(hasattr(os, 'getuid'), "POSIX permissions only")
+    def test_shared_cache_dir_not_used(self):
+        """A cache directory writable by others is not used"""
+        os.chmod(self.cache_dir, 0o777)
+        ChatSession._chat_cache_dir_usable.cache_clear()
+        self.addCleanup(ChatSession._chat_cache_dir_usable.cache_clear)
+        with self.assertLogs(ChatSession.Log, level='WARNING'):
+            Chat.from_path(self.write_session())
+        self.assertEqual(self.cache_entries(), [])
+
+
+class LoadChatsTests(unittest.TestCase):
+
+    def setUp(self):
+        session_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(session_dir.cleanup)
+        self.session_args = []
+        for i in range(3):
+            session_file = os.path.join(session_dir.name, f'session{i}.json')
+            with open(session_file, 'w', encoding='utf-8') as f:
+                f.write('{"requests": []}' if i != 1 else '{not json')
+            self.session_args.append((session_file, 0.0, 'ws'))
+        patcher = patch.dict(os.environ, {ChatSession.CHAT_CACHE_DIR_ENV_VAR: ''})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertLoaded(self, results):
+        self.assertEqual([c.id for c in results if isinstance(c, Chat)], ['session0', 'session2'])
+        self.assertIsInstance(results[1], Exception)
+
+    @patch("ChatSession.THREAD_POOL_MIN_SESSIONS", 0)
+    @patch("ChatSession.PROCESS_POOL_MIN_BYTES", 0)
+    @patch("ChatSession.os.cpu_count", return_value=4)
+    @patch("ChatSession.concurrent.futures.ProcessPoolExecutor", side_effect=OSError("no processes"))
+    def test_thread_fallback_keeps_order(self, mock_pool, _):
+        """Sessions load in threads when worker processes are unavailable"""
+        self.assertLoaded(ChatSession.load_chats(self.session_args))
+        mock_pool.assert_called_once()
+
+    @patch("ChatSession.PROCESS_POOL_MIN_BYTES", 0)
+    @patch("ChatSession.os.cpu_count", return_value=4)
+    @patch("ChatSession.concurrent.futures.ThreadPoolExecutor")
+    @patch("ChatSession.concurrent.futures.ProcessPoolExecutor")
+    def test_parallel_load_disabled(self, mock_process_pool, mock_thread_pool, _):
+        """The environment switch forces a serial load"""
+        with patch.dict(os.environ, {ChatSession.CHAT_LOAD_PARALLEL_ENV_VAR: '0'}):
+            self.assertLoaded(ChatSession.load_chats(self.session_args))
+        mock_process_pool.assert_not_called()
+        mock_thread_pool.assert_not_called()
+
+    @patch("ChatSession.concurrent.futures.ProcessPoolExecutor")
+    def test_serial_for_one_cpu_or_small_batches(self, mock_pool):
+        """No worker processes are started on one CPU or for little data to parse"""
+        for cpus, min_bytes in ((1, 0), (4, ChatSession.PROCESS_POOL_MIN_BYTES)):
+            with self.subTest(cpus=cpus, min_bytes=min_bytes), \
+                 patch("ChatSession.os.cpu_count", return_value=cpus), \
+                 patch("ChatSession.PROCESS_POOL_MIN_BYTES", min_bytes):
+                self.assertLoaded(ChatSession.load_chats(self.session_args))
+        mock_pool.assert_not_called()
+
+    @patch("ChatSession.PROCESS_POOL_MIN_BYTES", 0)
+    @patch("ChatSession.os.cpu_count", return_value=4)
+    @patch("ChatSession.concurrent.futures.ProcessPoolExecutor")
+    def test_cached_sessions_skip_workers(self, mock_pool, _):
+        """Only sessions missing from the disk cache are sent to the workers"""
+        pooled = []
+
+        def pool_map(fn, args, chunksize=1):
+            pooled.extend(args)
+            return [fn(a) for a in args]
+        mock_pool.return_value.__enter__.return_value.map.side_effect = pool_map
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        with patch.dict(os.environ, {ChatSession.CHAT_CACHE_DIR_ENV_VAR: cache_dir.name}):
+            Chat.from_path(*self.session_args[0])  # cached
+            self.assertLoaded(ChatSession.load_chats(self.session_args))
+        self.assertEqual(pooled, self.session_args[1:])
 
 
 class EventLogSessionTests(unittest.TestCase):
@@ -109,6 +300,16 @@ class EventLogSessionTests(unittest.TestCase):
         chat = _jsonl_chat_from_eventlog('')
         self.assertEqual(len(chat), 0)
 
+    def test_unicode_line_separator_in_text(self):
+        """A raw U+2028 inside a JSON string does not split the event line."""
+        text = 'first\u2028second'
+        content = _jsonl_eventlog(
+            _jsonl_snapshot_line(),
+            json.dumps({'kind': 2, 'v': [_jsonl_request_dict(text=text)]}, ensure_ascii=False),
+        )
+        chat = _jsonl_chat_from_eventlog(content)
+        self.assertEqual([r for r, _, _ in chat], [text])
+
     def test_invalid_first_event_raises(self):
         """A file whose first event is not kind:0 raises ValueError."""
         content = _jsonl_eventlog(
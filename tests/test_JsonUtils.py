@@ -0,0 +1,70 @@
+"""
+JSON utilities unit tests
+
+Copyright (c) 2025 by Eric Dey. All rights reserved.
+
+"""
+
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Ensure the parent directory is in sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import JsonUtils  # noqa: E402
+from JsonUtils import json_dumps_canonical, json_dumps_indented_bytes, json_loads  # noqa: E402
+
+
+class JsonUtilsTests(unittest.TestCase):
+
+    def test_loads_lone_surrogate(self):
+        """Test that a lone UTF-16 surrogate escape parses like the stdlib does"""
+        for data in ('"hi \\ud83d"', b'"hi \\ud83d"'):
+            with self.subTest(data_type=type(data).__name__):
+                self.assertEqual(json_loads(data), 'hi \ud83d')
+
+    def test_loads_invalid_json(self):
+        """Test that invalid JSON still raises a ValueError"""
+        with self.assertRaises(ValueError):
+            json_loads('{"requests": ')
+
+    def test_dumps_lone_surrogate(self):
+        """Test that strings with a lone surrogate serialize to valid UTF-8"""
+        self.assertEqual(json_dumps_indented_bytes('hi \ud83d'), b'"hi \\ud83d"')
+        self.assertEqual(json_dumps_indented_bytes('Café'), b'"Caf\\u00e9"')
+        self.assertEqual(json_dumps_canonical({'a': 'hi \ud83d'}), '{"a":"hi \ud83d"}'.encode('utf-8', errors='surrogatepass'))
+
+    def test_loads_wide_integers(self):
+        """Test that integers beyond 64 bits parse exactly, with and without orjson"""
+        data = '{"big": 1180591620717411303424, "low": -9223372036854775809, "s": "x"}'
+        expected = {'big': 2**70, 'low': -2**63 - 1, 's': 'x'}
+        with patch.object(JsonUtils, 'orjson', None):
+            self.assertEqual(json_loads(data), expected)
+        for payload in (data, data.encode('utf-8')):
+            with self.subTest(data_type=type(payload).__name__):
+                result = json_loads(payload)
+                self.assertEqual(result, expected)
+                self.assertIsInstance(result['big'], int)
+
+    def test_indented_matches_stdlib(self):
+        """Test that indented JSON escapes non-ASCII text like json.dumps(obj, indent=2)"""
+        obj = {'text': 'Hello \u201cq\u201d caf\u00e9 \U0001f600 \x7f', 'n': [1, 2.5, None], 'e': {}}
+        expected = json.dumps(obj, indent=2).encode('ascii')
+        with patch.object(JsonUtils, 'orjson', None):
+            self.assertEqual(json_dumps_indented_bytes(obj), expected)
+        self.assertEqual(json_dumps_indented_bytes(obj), expected)
+
+    def test_canonical_independent_of_orjson(self):
+        """Test that canonical JSON is the same with and without orjson"""
+        obj = {'b': 1e16, 'a': [0.1, 1e-7, 'Café', 2**70]}
+        expected = json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        with patch.object(JsonUtils, 'orjson', None):
+            self.assertEqual(json_dumps_canonical(obj), expected)
+        self.assertEqual(json_dumps_canonical(obj), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+GitHub Copilot Workspaces object unit tests
+
+Copyright (c) 2025 by Eric Dey. All rights reserved.
+
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Ensure the parent directory is in sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ChatSession  # noqa: E402
+import Workspace  # noqa: E402
+from Workspace import _IdPrefixIndex  # noqa: E402
+
+
+class IdPrefixIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        ids = ['c4ca4238', 'cfcd2084', 'c81e728d', 'a87ff679', 'c4ca9999']
+        self.objects = [SimpleNamespace(id=i) for i in ids]
+        self.index = _IdPrefixIndex(self.objects)
+
+    def test_matches_linear_scan(self):
+        """Test that every prefix finds the same object as a linear startswith() scan"""
+        prefixes = {o.id[:n] for o in self.objects for n in range(len(o.id) + 1)}
+        prefixes |= {'x', 'c4cb', 'c4ca42381'}
+        for prefix in sorted(prefixes):
+            with self.subTest(prefix=prefix):
+                expected = next((o for o in self.objects if o.id.startswith(prefix)), None)
+                self.assertIs(self.index.find(prefix), expected)
+
+    def test_empty_index(self):
+        """Test that an empty index finds nothing"""
+        self.assertIsNone(_IdPrefixIndex([]).find(''))
+        self.assertIsNone(_IdPrefixIndex([]).find('c4'))
+
+
+class WorkspaceFindTests(unittest.TestCase):
+
+    def setUp(self):
+        storage_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(storage_dir.cleanup)
+        sessions_dir = os.path.join(storage_dir.name, 'chatSessions')
+        os.mkdir(sessions_dir)
+        with open(os.path.join(storage_dir.name, 'workspace.json'), 'w', encoding='utf-8') as f:
+            json.dump({'folder': 'file:///project'}, f)
+        for chat_id in ('aaa111', 'bbb222', 'bbb333'):
+            with open(os.path.join(sessions_dir, f'{chat_id}.json'), 'w', encoding='utf-8') as f:
+                json.dump({'requests': [{'message': {'text': chat_id}, 'response': []}]}, f)
+        with open(os.path.join(sessions_dir, 'notes.txt'), 'w', encoding='utf-8') as f:
+            f.write('not a chat session')
+        patcher = patch.dict(os.environ, {ChatSession.CHAT_CACHE_DIR_ENV_VAR: ''})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage_dir = storage_dir.name
+
+    def test_find_parses_only_matching_sessions(self):
+        """Test that finding a chat in an unsorted workspace parses only the matching session files"""
+        workspace = Workspace.Workspace(self.storage_dir)
+        with patch('Workspace.load_chats', wraps=Workspace.load_chats) as mock_load:
+            chat = workspace.find('bbb')
+        stems = [os.path.splitext(os.path.basename(f))[0] for f in workspace._sessionFiles]
+        self.assertEqual(chat.id, next(i for i in stems if i.startswith('bbb')))  # first in directory order
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertIsNone(workspace.find('ccc'))
+        self.assertIsNone(workspace._chats)
+
+    def test_only_session_files_counted(self):
+        """Test that files without a session file extension are not counted or loaded"""
+        workspace = Workspace.Workspace(self.storage_dir)
+        self.assertEqual(workspace.chatCount, 3)
+        self.assertEqual(len(workspace.chats), 3)
+
+    def test_load_parses_sessions_once(self):
+        """Test that load() parses the sessions and later access of chats reuses them"""
+        workspace = Workspace.Workspace(self.storage_dir)
+        with patch('Workspace.load_chats', wraps=Workspace.load_chats) as mock_load:
+            chats = workspace.load()
+            self.assertIs(workspace.chats, chats)
+        self.assertEqual(sorted(c.id for c in chats), ['aaa111', 'bbb222', 'bbb333'])
+        self.assertEqual(mock_load.call_count, 1)
+
+    def test_find_matches_loaded_chats(self):
+        """Test that the file name lookup and the loaded chats agree"""
+        for prefix in ('a', 'bbb', 'bbb3', 'x'):
+            with self.subTest(prefix=prefix):
+                lazy = Workspace.Workspace(self.storage_dir).find(prefix)
+                loaded = Workspace.Workspace(self.storage_dir)
+                self.assertEqual(len(loaded.chats), 3)  # load all chats first
+                eager = loaded.find(prefix)
+                self.assertEqual(getattr(lazy, 'id', None), getattr(eager, 'id', None))
+
+    def test_sort_direction_follows_latest_spec(self):
+        """Test that a later sort without '-' sorts ascending again"""
+        workspace = Workspace.Workspace(self.storage_dir, sortBy='-id')
+        self.assertEqual([c.id for c in workspace.chats], ['bbb333', 'bbb222', 'aaa111'])
+        workspace.sort('id')
+        self.assertEqual([c.id for c in workspace.chats], ['aaa111', 'bbb222', 'bbb333'])
+
+
+if __name__ == "__main__":
+    unittest.main()
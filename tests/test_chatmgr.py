@@ -0,0 +1,86 @@
+"""
+GitHub Copilot chat manager tool unit tests
+
+Copyright (c) 2025 by Eric Dey. All rights reserved.
+
+"""
+
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Ensure the parent directory is in sys.path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import ChatSession  # noqa: E402
+import chatmgr  # noqa: E402
+
+
+class ParseOnlyTests(unittest.TestCase):
+
+    def setUp(self):
+        storage_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(storage_dir.cleanup)
+        sessions_dir = os.path.join(storage_dir.name, 'c4ca4238a0b923820dcc509a6f75849b', 'chatSessions')
+        os.makedirs(sessions_dir)
+        with open(os.path.join(sessions_dir, 'broken.json'), 'w', encoding='utf-8') as f:
+            f.write('{not json')
+        bad_edit = {'kind': 'textEditGroup', 'uri': {'fsPath': 'f.py'}, 'edits': [['not a dict']]}
+        with open(os.path.join(sessions_dir, 'badedit.json'), 'w', encoding='utf-8') as f:
+            json.dump({'requests': [{'message': {'text': 'Hello'}, 'response': [bad_edit]}]}, f)
+        patcher = patch.dict(os.environ, {ChatSession.CHAT_CACHE_DIR_ENV_VAR: ''})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage_dir = storage_dir.name
+
+    def test_parse_only_list_parses_sessions(self):
+        """Test that parse-only list mode parses every session and reports failures"""
+        with self.assertLogs(level='INFO') as logs:
+            self.assertEqual(chatmgr.main(['chatmgr.py', '--storage', self.storage_dir, '--parse-only', 'list']), 0)
+        output = '\n'.join(logs.output)
+        self.assertIn('failed to load chat session from file broken.json', output)
+        self.assertIn('skipping unparseable request', output)
+
+
+class RawOutputTests(unittest.TestCase):
+
+    workspace_id = 'c4ca4238a0b923820dcc509a6f75849b'
+    request = {'message': {'text': 'Hello \u201cq\u201d caf\u00e9'}, 'response': [{'value': 'It\u2019s \U0001f600'}]}
+
+    def setUp(self):
+        storage_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(storage_dir.cleanup)
+        sessions_dir = os.path.join(storage_dir.name, self.workspace_id, 'chatSessions')
+        os.makedirs(sessions_dir)
+        with open(os.path.join(sessions_dir, 'quotes.json'), 'w', encoding='utf-8') as f:
+            json.dump({'requests': [self.request]}, f, ensure_ascii=False)
+        patcher = patch.dict(os.environ, {ChatSession.CHAT_CACHE_DIR_ENV_VAR: ''})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage_dir = storage_dir.name
+
+    def raw_blocks(self, mode_option):
+        """returns the JSON code blocks printed by chat mode with the given raw option"""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            argv = ['chatmgr.py', '--storage', self.storage_dir, '-w', self.workspace_id, '-c', 'quotes', mode_option, '--output', '-']
+            self.assertEqual(chatmgr.main(argv), 0)
+        return [json.loads(block) for block in re.findall(r'```\n(.*?)\n```', output.getvalue(), re.DOTALL)]
+
+    def test_raw_json_survives_sanitizing(self):
+        """Test that --raw prints valid JSON that keeps non-ASCII text intact"""
+        self.assertEqual(self.raw_blocks('--raw'), [self.request['message']['text'], self.request['response']])
+
+    def test_raw_all_json_survives_sanitizing(self):
+        """Test that --raw-all prints the request as valid JSON that keeps non-ASCII text intact"""
+        self.assertEqual(self.raw_blocks('--raw-all'), [self.request])
+
+
+if __name__ == "__main__":
+    unittest.main()